@@ -1,5 +1,11 @@
 import uuid
-from typing import TypedDict, Annotated
+import asyncio
+import logging
+import requests
+from git import GitCommandError
+from dataclasses import dataclass
+from typing import TypedDict, Annotated, Optional
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END, add_messages
 from app.services.github import GitHubService
 from app.services.scanner import RepoScanner
@@ -7,8 +13,27 @@ from app.services.llm_gemini_real import GeminiLLMReal
 from app.services.gitops import GitOps
 from app.services.hosting import HostingManager
 from app.services.code_fixer import EnhancementPatchGenerator, DeploymentConfigGenerator
+from app.services.job_store import JobStore
+from app.services.email_report import PDFReportGenerator
 
-JOBS = {}
+logger = logging.getLogger(__name__)
+
+JOBS = JobStore(maxsize=500, ttl=3600)
+
+# Max GitHub API calls in flight per job when creating issues.
+ISSUE_CONCURRENCY = 5
+
+@dataclass(slots=True)
+class JobPayload:
+    """Inputs for one analysis job, as accepted by `run_job_async`."""
+    repo_url: str
+    access_token: str
+    auto_issue: bool = False
+    auto_pr: bool = False
+    hosting_provider: Optional[str] = None
+    gemini_api_key: Optional[str] = None
+    model_preference: Optional[str] = 'gemini-2.5-flash'
+    want_enhancement_patch: bool = True
 
 class AgentState(TypedDict):
     job_id: str
@@ -16,6 +41,7 @@ class AgentState(TypedDict):
     repo_url: str
     auto_issue: bool
     auto_pr: bool
+    want_enhancement_patch: bool
     hosting_provider: str
     owner: str
     repo: str
@@ -37,68 +63,77 @@ class AgentState(TypedDict):
     model_preference: str
 
 # Agent Nodes
-def repo_agent(state: AgentState) -> AgentState:
+# Each node returns only the keys it writes; LangGraph merges the partial
+# update into the state (plain keys are overwritten, messages are appended).
+async def repo_agent(state: AgentState) -> dict:
     """Agent responsible for repository operations."""
-    JOBS[state['job_id']]['progress'] = 'Downloading repository...'
+    JOBS.set_progress(state['job_id'], 'Downloading repository...')
     gh = GitHubService(state['token'])
     owner, repo = gh.parse_repo_url(state['repo_url'])
-    archive = gh.download_repo_zip(owner, repo)
+    archive = await asyncio.to_thread(gh.download_repo_zip, owner, repo)
     
-    JOBS[state['job_id']]['progress'] = 'Scanning files...'
+    JOBS.set_progress(state['job_id'], 'Scanning files...')
     scanner = RepoScanner()
-    files = scanner.extract_and_scan(archive)
+    with archive:
+        files = await asyncio.to_thread(scanner.extract_and_scan, archive)
     
     return {
-        **state,
         'owner': owner,
         'repo': repo,
         'files': files,
         'messages': [f"Repository {owner}/{repo} downloaded and scanned"]
     }
 
-def analysis_agent(state: AgentState) -> AgentState:
+async def analysis_agent(state: AgentState, config: RunnableConfig) -> dict:
     """Agent responsible for code analysis."""
-    JOBS[state['job_id']]['progress'] = 'Deep Analysis with AI...'
-    llm = GeminiLLMReal(api_key=state.get('gemini_api_key'), model=state.get('model_preference', 'gemini-2.5-flash'))
+    JOBS.set_progress(state['job_id'], 'Deep Analysis with AI...')
+    llm = config['configurable']['llm']
     
     # Perform comprehensive analysis using the new robust prompts
-    analysis = llm.analyze_comprehensive(state['files'])
+    analysis = await llm.analyze_comprehensive_async(state['files'])
     
     return {
-        **state,
         'issues': analysis['issues'],
         'enhancements': analysis['enhancements'],
         'file_suggestions': analysis['file_suggestions'],
-        'messages': state['messages'] + [f"Deep Analysis complete: Found {len(analysis['issues'])} critical issues"]
+        'messages': [f"Deep Analysis complete: Found {len(analysis['issues'])} critical issues"]
     }
 
-def patch_agent(state: AgentState) -> AgentState:
-    """Agent responsible for generating patches."""
-    JOBS[state['job_id']]['progress'] = 'Generating Engineering Fixes...'
-    llm = GeminiLLMReal(api_key=state.get('gemini_api_key'), model=state.get('model_preference', 'gemini-2.5-flash'))
+async def fix_patch_node(state: AgentState, config: RunnableConfig) -> dict:
+    """Agent responsible for generating fixes for detected issues."""
+    JOBS.set_progress(state['job_id'], 'Generating Engineering Fixes...')
+    llm = config['configurable']['llm']
     
     # Generate unified diff using the robust patch prompt
-    patch = llm.generate_patch(state['files'], state['issues']) if state['issues'] else None
+    patch = await llm.agenerate_patch(state['files'], state['issues']) if state['issues'] else None
     
+    return {
+        'patch': patch,
+        'messages': ["Engineering fixes generated"]
+    }
+
+def enhancement_patch_node(state: AgentState) -> dict:
+    """Agent responsible for turning enhancement suggestions into a patch."""
     # Keep enhancement patches separate
     enhancement_patch = EnhancementPatchGenerator.generate_enhancement_patch(state['enhancements'], state['files'])
     
-    hosting_config = None
-    deployment_patch = None
-    if state['hosting_provider']:
-        hosting_config = HostingManager.get_provider(state['hosting_provider'])
-        deployment_patch = DeploymentConfigGenerator.generate_deployment_patch(hosting_config, state['repo'])
+    return {
+        'enhancement_patch': enhancement_patch,
+        'messages': ["Enhancement patch generated"]
+    }
+
+def deployment_patch_node(state: AgentState) -> dict:
+    """Agent responsible for hosting provider configuration."""
+    hosting_config = HostingManager.get_provider(state['hosting_provider'])
+    deployment_patch = DeploymentConfigGenerator.generate_deployment_patch(hosting_config, state['repo'])
     
     return {
-        **state,
-        'patch': patch,
         'hosting_config': hosting_config,
-        'enhancement_patch': enhancement_patch,
         'deployment_patch': deployment_patch,
-        'messages': state['messages'] + ["Engineering fixes generated"]
+        'messages': ["Deployment configuration generated"]
     }
 
-def coordinator_agent(state: AgentState) -> AgentState:
+def coordinator_agent(state: AgentState) -> dict:
     """Agent that decides next actions based on analysis."""
     next_actions = []
     
@@ -110,41 +145,54 @@ def coordinator_agent(state: AgentState) -> AgentState:
         next_actions.append('finish')
     
     return {
-        **state,
         'next_action': next_actions[0],
-        'messages': state['messages'] + [f"Coordinator decided: {next_actions[0]}"]
+        'messages': [f"Coordinator decided: {next_actions[0]}"]
     }
 
-def action_agent(state: AgentState) -> AgentState:
+async def action_agent(state: AgentState) -> dict:
     """Agent responsible for GitHub actions."""
     gh = GitHubService(state['token'])
     created_issues = []
     pr_url = None
     
     if state['auto_issue'] and state['issues']:
-        JOBS[state['job_id']]['progress'] = 'Creating issues...'
-        for issue in state['issues']:
-            try:
-                url = gh.create_issue(state['owner'], state['repo'], issue['title'], issue['description'])
-                created_issues.append(url)
-            except Exception as e:
-                print(f"Failed to create issue: {e}")
+        JOBS.set_progress(state['job_id'], 'Creating issues...')
+        semaphore = asyncio.Semaphore(ISSUE_CONCURRENCY)
+        
+        async def create_one(issue):
+            async with semaphore:
+                try:
+                    return await asyncio.to_thread(gh.create_issue, state['owner'], state['repo'], issue['title'], issue['description'])
+                except requests.RequestException:
+                    logger.exception("create_issue failed", extra={"owner": state['owner'], "repo": state['repo']})
+                    return None
+        
+        urls = await asyncio.gather(*(create_one(issue) for issue in state['issues']))
+        created_issues = [url for url in urls if url]
     
     if state['auto_pr'] and state['issues'] and state['patch']:
-        JOBS[state['job_id']]['progress'] = 'Creating pull request...'
+        JOBS.set_progress(state['job_id'], 'Creating pull request...')
         try:
             gitops = GitOps(state['token'])
-            pr_url = gitops.create_pr_from_patch(state['owner'], state['repo'], state['patch'])
-        except Exception as e:
-            print(f"Failed to create PR: {e}")
+            pr_url = await asyncio.to_thread(gitops.create_pr_from_patch, state['owner'], state['repo'], state['patch'])
+        except (GitCommandError, requests.RequestException, OSError):
+            logger.exception("create_pr_from_patch failed", extra={"owner": state['owner'], "repo": state['repo']})
     
     return {
-        **state,
         'created_issues': created_issues,
         'pr_url': pr_url,
-        'messages': state['messages'] + [f"Created {len(created_issues)} issues, PR: {pr_url}"]
+        'messages': [f"Created {len(created_issues)} issues, PR: {pr_url}"]
     }
 
+def route_after_analysis(state: AgentState) -> list:
+    """Pick the patch branches this job needs; the rest are skipped entirely."""
+    branches = ["fix_patch_node"]
+    if state['auto_pr'] or state['want_enhancement_patch']:
+        branches.append("enhancement_patch_node")
+    if state['hosting_provider']:
+        branches.append("deployment_patch_node")
+    return branches
+
 def should_continue(state: AgentState) -> str:
     """Router function to determine next step."""
     if state.get('next_action') == 'create_issues' or state.get('next_action') == 'create_pr':
@@ -158,15 +206,21 @@ def create_workflow():
     # Add agent nodes
     workflow.add_node("repo_agent", repo_agent)
     workflow.add_node("analysis_agent", analysis_agent)
-    workflow.add_node("patch_agent", patch_agent)
+    workflow.add_node("fix_patch_node", fix_patch_node)
+    workflow.add_node("enhancement_patch_node", enhancement_patch_node)
+    workflow.add_node("deployment_patch_node", deployment_patch_node)
     workflow.add_node("coordinator_agent", coordinator_agent)
     workflow.add_node("action_agent", action_agent)
     
     # Define workflow edges
     workflow.set_entry_point("repo_agent")
     workflow.add_edge("repo_agent", "analysis_agent")
-    workflow.add_edge("analysis_agent", "patch_agent")
-    workflow.add_edge("patch_agent", "coordinator_agent")
+    # The patch generators only depend on the analysis, so the selected ones run
+    # as parallel branches; the coordinator runs once after whichever ran.
+    patch_nodes = ["fix_patch_node", "enhancement_patch_node", "deployment_patch_node"]
+    workflow.add_conditional_edges("analysis_agent", route_after_analysis, patch_nodes)
+    for node in patch_nodes:
+        workflow.add_edge(node, "coordinator_agent")
     workflow.add_conditional_edges(
         "coordinator_agent",
         should_continue,
@@ -179,20 +233,31 @@ def create_workflow():
     
     return workflow.compile()
 
-def run_job_sync(payload: dict) -> str:
-    """Run analysis job using LangGraph agents."""
+# The graph is static, so compile it once at import and reuse it for every job.
+WORKFLOW = create_workflow()
+
+def create_job() -> str:
+    """Register a new running job and return its id."""
     job_id = str(uuid.uuid4())
-    JOBS[job_id] = {'status': 'running', 'progress': 'Starting agentic analysis...'}
-    
+    JOBS.create(job_id, progress='Starting agentic analysis...')
+    return job_id
+
+async def run_job_async(job_id: str, payload: JobPayload):
+    """Run analysis job using LangGraph agents.
+
+    Meant to be scheduled in the background after `create_job`; progress and
+    the final result are published through JOBS for `get_job_result`.
+    """
     try:
         # Initialize agent state
         initial_state = AgentState(
             job_id=job_id,
-            token=payload['access_token'],
-            repo_url=payload['repo_url'],
-            auto_issue=payload.get('auto_issue', False),
-            auto_pr=payload.get('auto_pr', False),
-            hosting_provider=payload.get('hosting_provider', None),
+            token=payload.access_token,
+            repo_url=payload.repo_url,
+            auto_issue=payload.auto_issue,
+            auto_pr=payload.auto_pr,
+            want_enhancement_patch=payload.want_enhancement_patch,
+            hosting_provider=payload.hosting_provider,
             owner='',
             repo='',
             files=[],
@@ -209,13 +274,15 @@ def run_job_sync(payload: dict) -> str:
             deployment_pr_url='',
             messages=[],
             next_action='',
-            gemini_api_key=payload.get('gemini_api_key'),
-            model_preference=payload.get('model_preference', 'gemini-2.5-flash')
+            gemini_api_key=payload.gemini_api_key,
+            model_preference=payload.model_preference
         )
         
+        # One LLM wrapper per job, shared by the nodes through the run config
+        llm = GeminiLLMReal(api_key=payload.gemini_api_key, model=payload.model_preference)
+        
         # Run LangGraph workflow
-        workflow = create_workflow()
-        final_state = workflow.invoke(initial_state)
+        final_state = await WORKFLOW.ainvoke(initial_state, config={"configurable": {"llm": llm}})
         
         # Prepare result
         result = {
@@ -236,14 +303,22 @@ def run_job_sync(payload: dict) -> str:
             'agent_messages': final_state['messages']
         }
         
-        JOBS[job_id]['status'] = 'done'
-        JOBS[job_id]['result'] = result
+        JOBS.set_result(job_id, result)
         
     except Exception as e:
-        JOBS[job_id]['status'] = 'error'
-        JOBS[job_id]['error'] = str(e)
+        JOBS.set_error(job_id, str(e))
+        return
     
-    return job_id
+    # Render the report now so /download-report is served from the store.
+    await _prerender_pdf(job_id, result)
+
+async def _prerender_pdf(job_id: str, result: dict):
+    try:
+        pdf = await asyncio.to_thread(PDFReportGenerator.generate_pdf_report, result)
+    except Exception:
+        logger.warning("PDF pre-render failed for job %s", job_id, exc_info=True)
+        return
+    JOBS.set_pdf(job_id, pdf)
 
 def get_job_result(job_id: str):
     """Get result of a job."""
@@ -258,3 +333,7 @@ def get_job_result(job_id: str):
         return {'status': 'error', 'error': job.get('error', 'Unknown error')}
     
     return {'status': 'done', **job.get('result', {})}
+
+def get_job_pdf(job_id: str):
+    """Get the pre-rendered report PDF of a finished job, or None."""
+    return JOBS.get_pdf(job_id)
@@ -1,9 +1,11 @@
 """GitHub OAuth authentication endpoints."""
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import RedirectResponse
-import requests
 import os
+import asyncio
+import requests
 from dotenv import load_dotenv
+from app.utils.http import create_session, DEFAULT_TIMEOUT
 
 load_dotenv()
 
@@ -14,6 +16,9 @@ GITHUB_CLIENT_SECRET = os.getenv('GITHUB_CLIENT_SECRET')
 GITHUB_OAUTH_CALLBACK = os.getenv('GITHUB_OAUTH_CALLBACK', 'http://localhost:8000/auth/callback')
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
 
+# Reused across requests so the github.com connections stay warm.
+SESSION = create_session(headers={"Accept": "application/json"})
+
 @router.get("/login")
 async def github_login():
     """Redirect to GitHub OAuth login page."""
@@ -30,14 +35,16 @@ async def github_callback(code: str):
     """Handle GitHub OAuth callback and exchange code for access token."""
     try:
         # Exchange code for access token
-        token_response = requests.post(
+        # requests blocks, so GitHub round-trips run in a worker thread
+        token_response = await asyncio.to_thread(
+            SESSION.post,
             "https://github.com/login/oauth/access_token",
-            headers={"Accept": "application/json"},
             data={
                 "client_id": GITHUB_CLIENT_ID,
                 "client_secret": GITHUB_CLIENT_SECRET,
                 "code": code
-            }
+            },
+            timeout=DEFAULT_TIMEOUT
         )
         
         token_data = token_response.json()
@@ -47,9 +54,11 @@ async def github_callback(code: str):
             raise HTTPException(status_code=400, detail="Failed to get access token")
         
         # Get user info
-        user_response = requests.get(
+        user_response = await asyncio.to_thread(
+            SESSION.get,
             "https://api.github.com/user",
-            headers={"Authorization": f"token {access_token}"}
+            headers={"Authorization": f"token {access_token}"},
+            timeout=DEFAULT_TIMEOUT
         )
         
         user_data = user_response.json()
@@ -58,6 +67,8 @@ async def github_callback(code: str):
         redirect_url = f"{FRONTEND_URL}/callback?token={access_token}&user={user_data.get('login')}"
         return RedirectResponse(url=redirect_url)
     
+    except requests.Timeout:
+        raise HTTPException(status_code=504, detail="GitHub did not respond in time")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -65,9 +76,11 @@ async def github_callback(code: str):
 async def get_user(access_token: str):
     """Get authenticated user information."""
     try:
-        response = requests.get(
+        response = await asyncio.to_thread(
+            SESSION.get,
             "https://api.github.com/user",
-            headers={"Authorization": f"token {access_token}"}
+            headers={"Authorization": f"token {access_token}"},
+            timeout=DEFAULT_TIMEOUT
         )
         
         if response.status_code != 200:
@@ -75,5 +88,7 @@ async def get_user(access_token: str):
         
         return response.json()
     
+    except requests.Timeout:
+        raise HTTPException(status_code=504, detail="GitHub did not respond in time")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,18 +1,26 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.responses import Response, ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional
-from app.agents.orchestrator import run_job_sync, get_job_result
+from app.agents.orchestrator import JobPayload, create_job, run_job_async, get_job_result, get_job_pdf
 from app.services.github import GitHubService
 from app.services.gitops import GitOps
 from app.services.hosting import HostingManager
 from app.services.email_report import EmailReportService, PDFReportGenerator
 from app.services.user_repos import UserReposService
+import asyncio
 import logging
 import os
+import orjson
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Hosting provider configs never change at runtime; serve them pre-encoded
+# and let clients cache them.
+HOSTING_CACHE_HEADERS = {"Cache-Control": "public, max-age=3600"}
+_ALL_PROVIDERS_JSON = orjson.dumps(HostingManager.get_all_providers())
+
 class AnalyzeRequest(BaseModel):
     repo_url: str
     access_token: str
@@ -21,6 +29,7 @@ class AnalyzeRequest(BaseModel):
     hosting_provider: Optional[str] = None
     gemini_api_key: Optional[str] = None
     model_preference: Optional[str] = "gemini-2.5-flash"
+    want_enhancement_patch: bool = True  # set False to skip the enhancement patch
     model_config = {"protected_namespaces": ()}
 
 class AnalyzeRepoRequest(BaseModel):
@@ -32,6 +41,7 @@ class AnalyzeRepoRequest(BaseModel):
     hosting_provider: Optional[str] = None
     gemini_api_key: Optional[str] = None
     model_preference: Optional[str] = "gemini-2.5-flash"
+    want_enhancement_patch: bool = True  # set False to skip the enhancement patch
     model_config = {"protected_namespaces": ()}
 
 class CreateIssueRequest(BaseModel):
@@ -51,33 +61,34 @@ class SendReportRequest(BaseModel):
     user_name: str = "User"
 
 @router.post("/analyze")
-async def analyze(req: AnalyzeRequest):
+async def analyze(req: AnalyzeRequest, background_tasks: BackgroundTasks):
     """Start analysis job with optional hosting config."""
     try:
-        job_id = run_job_sync(req.dict())
+        job_id = create_job()
+        background_tasks.add_task(run_job_async, job_id, JobPayload(**req.model_dump()))
         return {"job_id": job_id}
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/analyze-repo")
-async def analyze_repo(req: AnalyzeRepoRequest):
+async def analyze_repo(req: AnalyzeRepoRequest, background_tasks: BackgroundTasks):
     """Analyze a repository by owner/repo name."""
     try:
         # Convert repo_full_name to URL
-        repo_url = f"https://github.com/{req.repo_full_name}.git"
-        
-        analyze_req = AnalyzeRequest(
-            repo_url=repo_url,
+        payload = JobPayload(
+            repo_url=f"https://github.com/{req.repo_full_name}.git",
             access_token=req.access_token,
             auto_issue=req.auto_issue,
             auto_pr=req.auto_pr,
             hosting_provider=req.hosting_provider,
             gemini_api_key=req.gemini_api_key,
-            model_preference=req.model_preference
+            model_preference=req.model_preference,
+            want_enhancement_patch=req.want_enhancement_patch
         )
         
-        job_id = run_job_sync(analyze_req.dict())
+        job_id = create_job()
+        background_tasks.add_task(run_job_async, job_id, payload)
         return {"job_id": job_id}
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
@@ -87,7 +98,7 @@ async def analyze_repo(req: AnalyzeRepoRequest):
 async def get_user_repos(access_token: str):
     """Get all repositories for the authenticated user."""
     try:
-        repos = UserReposService.get_user_repos(access_token)
+        repos = await asyncio.to_thread(UserReposService.get_user_repos, access_token)
         return {"repos": repos}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -96,7 +107,7 @@ async def get_user_repos(access_token: str):
 async def search_repos(q: str, access_token: Optional[str] = None):
     """Search for public repositories."""
     try:
-        repos = UserReposService.search_repositories(q, access_token)
+        repos = await asyncio.to_thread(UserReposService.search_repositories, q, access_token)
         return {"repos": repos}
     except Exception as e:
         logger.error(f"Search error: {str(e)}")
@@ -106,7 +117,7 @@ async def search_repos(q: str, access_token: Optional[str] = None):
 async def check_pr_access(repo_full_name: str, access_token: str):
     """Check if user can create PRs on a repository."""
     try:
-        has_access = UserReposService.check_repo_access(access_token, repo_full_name)
+        has_access = await asyncio.to_thread(UserReposService.check_repo_access, access_token, repo_full_name)
         return {"can_create_pr": has_access}
     except Exception as e:
         logger.error(f"Error checking PR access: {str(e)}")
@@ -116,7 +127,7 @@ async def check_pr_access(repo_full_name: str, access_token: str):
 async def get_public_repo(repo_full_name: str):
     """Get info about a public repository (anyone can use)."""
     try:
-        repo = UserReposService.get_public_repo(repo_full_name)
+        repo = await asyncio.to_thread(UserReposService.get_public_repo, repo_full_name)
         if not repo:
             raise HTTPException(status_code=404, detail="Repository not found")
         return repo
@@ -143,7 +154,7 @@ async def create_issue(req: CreateIssueRequest):
     gh = GitHubService(req.access_token)
     owner, repo_name = result['owner'], result['repo']
     
-    issue_url = gh.create_issue(owner, repo_name, req.issue_title, req.issue_body)
+    issue_url = await asyncio.to_thread(gh.create_issue, owner, repo_name, req.issue_title, req.issue_body)
     return {"issue_url": issue_url}
 
 @router.post("/pr")
@@ -159,7 +170,7 @@ async def create_pr(req: CreatePRRequest):
     gitops = GitOps(req.access_token)
     owner, repo_name = result['owner'], result['repo']
     
-    pr_url = gitops.create_pr_from_patch(owner, repo_name, result['patch'])
+    pr_url = await asyncio.to_thread(gitops.create_pr_from_patch, owner, repo_name, result['patch'])
     result['pr_url'] = pr_url
     
     return {"pr_url": pr_url}
@@ -191,7 +202,8 @@ This PR contains AI-suggested code improvements:
 
 Please review each suggestion and apply the ones that fit your project standards."""
     
-    pr_url = gitops.create_pr_from_patch(
+    pr_url = await asyncio.to_thread(
+        gitops.create_pr_from_patch,
         owner, 
         repo_name, 
         result['enhancement_patch'],
@@ -231,7 +243,8 @@ This PR adds all necessary configuration files for deploying to {hosting_name}:
 3. Configure environment variables
 4. Deploy!"""
     
-    pr_url = gitops.create_pr_from_patch(
+    pr_url = await asyncio.to_thread(
+        gitops.create_pr_from_patch,
         owner, 
         repo_name, 
         result['deployment_patch'],
@@ -245,7 +258,7 @@ This PR adds all necessary configuration files for deploying to {hosting_name}:
 @router.get("/hosting/providers")
 async def get_hosting_providers():
     """Get all available hosting providers."""
-    return HostingManager.get_all_providers()
+    return Response(content=_ALL_PROVIDERS_JSON, media_type="application/json", headers=HOSTING_CACHE_HEADERS)
 
 @router.get("/hosting/provider/{provider_name}")
 async def get_hosting_provider(provider_name: str):
@@ -253,7 +266,7 @@ async def get_hosting_provider(provider_name: str):
     config = HostingManager.get_provider(provider_name)
     if not config:
         raise HTTPException(status_code=404, detail="Provider not found")
-    return config
+    return ORJSONResponse(config, headers=HOSTING_CACHE_HEADERS)
 
 @router.get("/hosting/suggest")
 async def suggest_hosting(project_type: str = 'full-stack'):
@@ -270,7 +283,8 @@ async def send_report(req: SendReportRequest):
     try:
         # Try to generate PDF report
         email_service = EmailReportService()
-        response = email_service.send_report(
+        response = await asyncio.to_thread(
+            email_service.send_report,
             recipient_email=req.recipient_email,
             analysis_result=result,
             user_email=req.user_email,
@@ -279,7 +293,8 @@ async def send_report(req: SendReportRequest):
         
         if not response['success']:
             # Fallback to simple HTML email if PDF fails
-            response = EmailReportService.send_simple_report(
+            response = await asyncio.to_thread(
+                EmailReportService.send_simple_report,
                 recipient_email=req.recipient_email,
                 analysis_result=result,
                 user_email=req.user_email,
@@ -303,12 +318,16 @@ async def download_report(job_id: str):
         raise HTTPException(status_code=404, detail="Job not found")
     
     try:
-        pdf_content = PDFReportGenerator.generate_pdf_report(result)
+        pdf_content = get_job_pdf(job_id)
+        if pdf_content is None:
+            pdf_content = await asyncio.to_thread(PDFReportGenerator.generate_pdf_report, result)
+        filename = f"audit_report_{result.get('owner', 'repo')}_{result.get('repo', 'name')}.pdf"
         
-        return {
-            "pdf": pdf_content.hex(),
-            "filename": f"audit_report_{result.get('owner', 'repo')}_{result.get('repo', 'name')}.pdf"
-        }
+        return Response(
+            content=pdf_content,
+            media_type="application/pdf",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
     except Exception as e:
         logger.error(f"PDF generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate PDF: {str(e)}")
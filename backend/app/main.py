@@ -1,5 +1,10 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api import router, auth
 import logging
 from dotenv import load_dotenv
@@ -14,16 +19,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="AI Code Auditor API", version="2.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Blocking GitHub/Gemini/git/SMTP calls are offloaded with asyncio.to_thread;
+    # size the default executor for that I/O-heavy load.
+    executor = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4))
+    asyncio.get_running_loop().set_default_executor(executor)
+    yield
+    executor.shutdown(wait=False)
+
+app = FastAPI(title="AI Code Auditor API", version="2.0.0", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# CORS policy, fixed at startup. Explicit methods/headers let the middleware
+# answer preflights from static sets instead of echoing whatever was requested.
+CORS_ORIGINS = (
+    "http://localhost:3000",
+    "http://localhost:8000",
+    "https://codex-k8eu.onrender.com",  # Add your frontend URL
+    "https://codexai-lwoi.onrender.com",
+)
+CORS_METHODS = ("GET", "POST", "OPTIONS")
+CORS_HEADERS = ("Authorization", "Content-Type", "Accept")
 
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost:8000","https://codex-k8eu.onrender.com",  # Add your frontend URL
-        "https://codexai-lwoi.onrender.com"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=CORS_METHODS,
+    allow_headers=CORS_HEADERS,
+    expose_headers=["Content-Disposition"],
 )
 
 # Include routers
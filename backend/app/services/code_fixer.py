@@ -1,4 +1,123 @@
 """Code fixer service - Generates actual fixes for enhancement suggestions."""
+import difflib
+import json
+import re
+from bisect import bisect_right
+from collections import defaultdict
+
+# A "scripts" object with no nested braces; group 1 is its body.
+_SCRIPTS_OBJECT_RE = re.compile(r'"scripts"\s*:\s*\{([^{}]*)\}')
+# JSON strings and the brackets that change nesting depth outside them.
+_JSON_NESTING_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+
+
+def _top_level_key_match(pattern, content):
+    """Last match of `pattern` that starts with a key of the top-level JSON object.
+    
+    A match counts only if it begins exactly at a string token sitting at
+    nesting depth 1, so same-named keys in nested objects (and text inside
+    string values) are ignored.
+    """
+    found = None
+    tokens = _JSON_NESTING_RE.finditer(content)
+    token = next(tokens, None)
+    depth = 0
+    for match in pattern.finditer(content):
+        pos = match.start()
+        while token is not None and token.start() < pos:
+            if token.end() > pos:
+                break  # `pos` is inside this string token
+            char = token.group()
+            if char in '{[':
+                depth += 1
+            elif char in '}]':
+                depth -= 1
+            token = next(tokens, None)
+        if token is not None and token.start() == pos and depth == 1:
+            found = match
+    return found
+
+
+def _line_starts(content):
+    """Offsets at which each line of `content` begins."""
+    starts = [0]
+    pos = content.find('\n')
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = content.find('\n', pos + 1)
+    if starts[-1] == len(content):
+        # Trailing newline (or empty content) doesn't open another line
+        starts.pop()
+    return starts
+
+
+def _line_span(content, starts, idx):
+    """(start, end) offsets of line `idx`, including its newline."""
+    end = starts[idx + 1] if idx + 1 < len(starts) else len(content)
+    return starts[idx], end
+
+
+def _insert_json_member(content, pos, key, value):
+    """Insert `"key": "value"` as the first member of the JSON object opened just before `pos`."""
+    member = f'{json.dumps(key)}: {json.dumps(value)}'
+    ws = re.match(r'\s*', content[pos:]).group(0)
+    if content.startswith('}', pos + len(ws)):
+        # Empty object
+        return content[:pos] + member + content[pos:]
+    # Reuse the whitespace before the current first member so indentation matches
+    return content[:pos] + ws + member + ',' + content[pos:]
+
+
+# Fix handlers return edits as (start, end, replacement) offsets into the
+# original content, so several fixes on one file can be applied in one pass.
+
+def _insert_at_line(content, starts, idx, text):
+    """Edit inserting `text` before line `idx` (or at the end if idx is past the last line)."""
+    off = starts[idx] if idx < len(starts) else len(content)
+    return (off, off, text)
+
+
+def _replace_line(content, starts, idx, new_line):
+    """Edit replacing line `idx` (including its newline) with `new_line`."""
+    start, end = _line_span(content, starts, idx)
+    return (start, end, new_line)
+
+
+def _edit_line(content, starts, line, transform):
+    """Edit rewriting 1-based `line` as `transform(line_text)`.
+    
+    Returns None if the line doesn't exist or `transform` returns None.
+    """
+    if line <= 0 or line > len(starts):
+        return None
+    start, end = _line_span(content, starts, line - 1)
+    new_line = transform(content[start:end])
+    if new_line is None:
+        return None
+    return (start, end, new_line)
+
+
+def _apply_edits(content, edits):
+    """Splice non-overlapping edits into `content`.
+    
+    Returns (new_content, indexes of the edits applied). An edit overlapping
+    one earlier in the content is skipped.
+    """
+    order = sorted(range(len(edits)), key=lambda i: edits[i][:2])
+    parts = []
+    applied = []
+    pos = 0
+    for i in order:
+        start, end, text = edits[i]
+        if start < pos:
+            continue
+        parts.append(content[pos:start])
+        parts.append(text)
+        pos = end
+        applied.append(i)
+    parts.append(content[pos:])
+    return ''.join(parts), applied
+
 
 class CodeFixer:
     """Generate code fixes for enhancement suggestions."""
@@ -6,167 +125,201 @@ class CodeFixer:
     @staticmethod
     def generate_fix(enhancement, file_content):
         """Generate actual code fix for an enhancement."""
+        edit = CodeFixer._fix_edit(enhancement, file_content, _line_starts(file_content))
+        if edit is None:
+            return None
+        return _apply_edits(file_content, [edit])[0]
+    
+    @staticmethod
+    def apply_fixes(enhancements, file_content):
+        """Apply every applicable fix for one file's enhancements.
+        
+        Returns (fixed_content, applied_enhancements). Line-level fixes are
+        spliced in together in a single pass, and fixes that would overlap an
+        earlier edit in the file are dropped. npm script fixes (which may
+        re-serialize the whole package.json) then run one after another on
+        the result, so several of them all land.
+        """
+        starts = _line_starts(file_content)
+        edits = []
+        sources = []
+        script_fixes = []
+        for i, enhancement in enumerate(enhancements):
+            handler = CodeFixer._line_handler(enhancement)
+            if handler is not None:
+                edit = handler(file_content, starts, enhancement.get('line', 0))
+                if edit is not None:
+                    edits.append(edit)
+                    sources.append(i)
+            elif CodeFixer._is_script_fix(enhancement):
+                script_fixes.append(i)
+        
+        fixed_content, applied = _apply_edits(file_content, edits)
+        applied = [sources[k] for k in applied]
+        
+        for i in script_fixes:
+            fixed = CodeFixer._add_npm_script(fixed_content, enhancements[i])
+            if fixed is not None:
+                fixed_content = fixed
+                applied.append(i)
+        
+        return fixed_content, [enhancements[i] for i in sorted(applied)]
+    
+    @staticmethod
+    def _fix_edit(enhancement, file_content, starts):
+        """Return the (start, end, text) edit fixing an enhancement, or None."""
+        handler = CodeFixer._line_handler(enhancement)
+        if handler is not None:
+            return handler(file_content, starts, enhancement.get('line', 0))
         
-        enhancement_type = enhancement.get('type', '')
-        title = enhancement.get('title', '')
-        line = enhancement.get('line', 0)
-        file_path = enhancement.get('file', '')
-        
-        if 'list comprehension' in title.lower() and 'python' in file_path.lower():
-            return CodeFixer._fix_list_comprehension(file_content, line)
-        
-        elif 'docstring' in title.lower() and 'python' in file_path.lower():
-            return CodeFixer._fix_missing_docstring(file_content, line)
-        
-        elif 'long function' in title.lower():
-            return CodeFixer._suggest_function_split(file_content, line)
-        
-        elif 'console.log' in title.lower():
-            return CodeFixer._remove_console_log(file_content, line)
-        
-        elif 'var ' in title.lower() and ('const' in title.lower() or 'let' in title.lower()):
-            return CodeFixer._fix_var_to_const(file_content, line)
-        
-        elif 'semicolon' in title.lower():
-            return CodeFixer._add_semicolon(file_content, line)
+        if CodeFixer._is_script_fix(enhancement):
+            fixed = CodeFixer._add_npm_script(file_content, enhancement)
+            return (0, len(file_content), fixed) if fixed is not None else None
         
-        elif 'lint' in title.lower() or 'test' in title.lower():
-            return CodeFixer._add_npm_script(file_content, enhancement)
+        return None
+    
+    @staticmethod
+    def _line_handler(enhancement):
+        """The line-level fix handler matching an enhancement, or None."""
+        title = enhancement.get('title', '').lower()
+        file_path = enhancement.get('file', '').lower()
         
+        for needle, path_needle, any_of, handler in _LINE_FIXES:
+            if needle not in title:
+                continue
+            if path_needle is not None and path_needle not in file_path:
+                continue
+            if any_of is not None and not any(word in title for word in any_of):
+                continue
+            return handler
         return None
     
     @staticmethod
-    def _fix_list_comprehension(content, line):
+    def _is_script_fix(enhancement):
+        title = enhancement.get('title', '').lower()
+        return 'lint' in title or 'test' in title
+    
+    @staticmethod
+    def _fix_list_comprehension(content, starts, line):
         """Convert loop with append to list comprehension."""
-        lines = content.splitlines(keepends=True)
-        
-        if line <= 0 or line > len(lines):
+        if line <= 0 or line > len(starts):
             return None
         
-        # Find the for loop
-        for_line_idx = None
-        for i in range(max(0, line - 5), min(len(lines), line + 5)):
-            if 'for ' in lines[i]:
-                for_line_idx = i
-                break
+        # Find the for loop: one scan over the window of lines around `line`
+        lo = max(0, line - 5)
+        hi = min(len(starts), line + 5)
+        window_end = starts[hi] if hi < len(starts) else len(content)
+        pos = content.find('for ', starts[lo], window_end)
+        for_line_idx = bisect_right(starts, pos) - 1 if pos != -1 else None
         
         if not for_line_idx:
             return None
         
         # Create comment suggesting fix
-        fixed_lines = lines.copy()
-        fixed_lines.insert(for_line_idx, f"# TODO: Convert to list comprehension: [expr for item in iterable]\n")
-        
-        return ''.join(fixed_lines)
+        return _insert_at_line(content, starts, for_line_idx, f"# TODO: Convert to list comprehension: [expr for item in iterable]\n")
     
     @staticmethod
-    def _fix_missing_docstring(content, line):
+    def _fix_missing_docstring(content, starts, line):
         """Add docstring template to function."""
-        lines = content.splitlines(keepends=True)
-        
-        if line <= 0 or line > len(lines):
+        if line <= 0 or line > len(starts):
             return None
         
-        fixed_lines = lines.copy()
-        indent = len(lines[line - 1]) - len(lines[line - 1].lstrip())
+        target_line = content[slice(*_line_span(content, starts, line - 1))]
+        indent = len(target_line) - len(target_line.lstrip())
         indent_str = ' ' * (indent + 4)
         
         docstring = f'{indent_str}"""\n{indent_str}Function description.\n{indent_str}\n{indent_str}Args:\n{indent_str}    param: Description\n{indent_str}\n{indent_str}Returns:\n{indent_str}    Description of return value\n{indent_str}"""\n'
         
-        fixed_lines.insert(line, docstring)
-        
-        return ''.join(fixed_lines)
+        return _insert_at_line(content, starts, line, docstring)
     
     @staticmethod
-    def _suggest_function_split(content, line):
+    def _suggest_function_split(content, starts, line):
         """Suggest splitting a long function."""
-        lines = content.splitlines(keepends=True)
-        
-        if line <= 0 or line > len(lines):
+        if line <= 0 or line > len(starts):
             return None
         
-        fixed_lines = lines.copy()
         # Add comment suggesting refactoring
-        fixed_lines.insert(line, "# REFACTOR: This function is too long. Consider splitting into smaller helper functions.\n")
-        
-        return ''.join(fixed_lines)
+        return _insert_at_line(content, starts, line, "# REFACTOR: This function is too long. Consider splitting into smaller helper functions.\n")
     
     @staticmethod
-    def _remove_console_log(content, line):
+    def _remove_console_log(content, starts, line):
         """Remove or comment out console.log statements."""
-        lines = content.splitlines(keepends=True)
-        
-        if line <= 0 or line > len(lines):
-            return None
-        
-        fixed_lines = lines.copy()
-        target_line = fixed_lines[line - 1]
         
-        # Comment out the console.log
-        if 'console.log' in target_line:
+        def comment_out(target_line):
+            if 'console.log' not in target_line:
+                return None
             indent = len(target_line) - len(target_line.lstrip())
-            indent_str = ' ' * indent
-            fixed_lines[line - 1] = f'{indent_str}// {target_line.lstrip()}'
+            return f"{' ' * indent}// {target_line.lstrip()}"
         
-        return ''.join(fixed_lines)
+        return _edit_line(content, starts, line, comment_out)
     
     @staticmethod
-    def _fix_var_to_const(content, line):
+    def _fix_var_to_const(content, starts, line):
         """Convert var to const or let."""
-        lines = content.splitlines(keepends=True)
-        
-        if line <= 0 or line > len(lines):
-            return None
-        
-        fixed_lines = lines.copy()
-        target_line = fixed_lines[line - 1]
-        
-        if 'var ' in target_line:
-            fixed_lines[line - 1] = target_line.replace('var ', 'const ')
-        
-        return ''.join(fixed_lines)
+        return _edit_line(
+            content, starts, line,
+            lambda target_line: target_line.replace('var ', 'const ') if 'var ' in target_line else None
+        )
     
     @staticmethod
-    def _add_semicolon(content, line):
+    def _add_semicolon(content, starts, line):
         """Add missing semicolon at end of line."""
-        lines = content.splitlines(keepends=True)
-        
-        if line <= 0 or line > len(lines):
-            return None
-        
-        fixed_lines = lines.copy()
-        target_line = fixed_lines[line - 1]
         
-        stripped = target_line.rstrip()
-        if not stripped.endswith(';'):
-            fixed_lines[line - 1] = stripped + ';\n'
+        def terminate(target_line):
+            stripped = target_line.rstrip()
+            return None if stripped.endswith(';') else stripped + ';\n'
         
-        return ''.join(fixed_lines)
+        return _edit_line(content, starts, line, terminate)
     
     @staticmethod
     def _add_npm_script(content, enhancement):
         """Add missing npm script to package.json."""
+        title = enhancement.get('title', '').lower()
+        if 'lint' in title:
+            key, command = 'lint', 'eslint .'
+        elif 'test' in title:
+            key, command = 'test', 'jest'
+        else:
+            key = None
+        
         try:
-            import json
-            
             data = json.loads(content)
-            
-            if 'lint' in enhancement.get('title', '').lower():
-                if 'scripts' not in data:
-                    data['scripts'] = {}
-                if 'lint' not in data['scripts']:
-                    data['scripts']['lint'] = 'eslint .'
-            
-            elif 'test' in enhancement.get('title', '').lower():
-                if 'scripts' not in data:
-                    data['scripts'] = {}
-                if 'test' not in data['scripts']:
-                    data['scripts']['test'] = 'jest'
-            
-            return json.dumps(data, indent=2)
-        except:
+        except json.JSONDecodeError:
             return None
+        
+        if not isinstance(data, dict):
+            return None
+        if key is None:
+            return content
+        
+        scripts = data.get('scripts')
+        if isinstance(scripts, dict) and key in scripts:
+            return content
+        
+        # Common case: a flat top-level "scripts" object. Splice the member in
+        # place so the rest of the file isn't reformatted.
+        if isinstance(scripts, dict):
+            match = _top_level_key_match(_SCRIPTS_OBJECT_RE, content)
+            if match:
+                return _insert_json_member(content, match.start(1), key, command)
+        
+        # No scripts object, or one the pattern can't match (nested braces)
+        if not isinstance(scripts, dict):
+            data['scripts'] = {}
+        data['scripts'][key] = command
+        return json.dumps(data, indent=2, separators=(',', ': '))
 
+# Title substring -> line-level fix, checked in order. Each entry is
+# (title needle, required file-path substring or None,
+#  alternative title words of which one must also appear or None, handler).
+_LINE_FIXES = (
+    ('list comprehension', 'python', None, CodeFixer._fix_list_comprehension),
+    ('docstring', 'python', None, CodeFixer._fix_missing_docstring),
+    ('long function', None, None, CodeFixer._suggest_function_split),
+    ('console.log', None, None, CodeFixer._remove_console_log),
+    ('var ', None, ('const', 'let'), CodeFixer._fix_var_to_const),
+    ('semicolon', None, None, CodeFixer._add_semicolon),
+)
 
 class EnhancementPatchGenerator:
     """Generate patches for enhancement fixes."""
@@ -175,59 +328,77 @@ class EnhancementPatchGenerator:
     def generate_enhancement_patch(enhancements, files):
         """Generate unified diff patch for all enhancements."""
         
-        patches = []
+        out = []
         file_map = {f['path']: f['content'] for f in files}
         
+        # Fix each file once with all of its enhancements, so the content is
+        # indexed once and the file gets one consistent diff.
+        by_file = defaultdict(list)
         for enhancement in enhancements:
             file_path = enhancement.get('file', '')
-            
-            if file_path not in file_map:
-                continue
-            
+            if file_path in file_map:
+                by_file[file_path].append(enhancement)
+        
+        for file_path, file_enhancements in by_file.items():
             original_content = file_map[file_path]
-            fixed_content = CodeFixer.generate_fix(enhancement, original_content)
+            fixed_content, applied = CodeFixer.apply_fixes(file_enhancements, original_content)
             
-            if not fixed_content or fixed_content == original_content:
+            if not applied or fixed_content == original_content:
                 continue
             
             # Generate unified diff
-            patch = EnhancementPatchGenerator._create_unified_diff(
+            patch_parts = EnhancementPatchGenerator._create_unified_diff(
                 file_path,
                 original_content,
                 fixed_content,
-                enhancement
+                applied
             )
             
-            if patch:
-                patches.append(patch)
+            if patch_parts:
+                if out:
+                    out.append('\n')
+                out.extend(patch_parts)
         
-        return '\n'.join(patches) if patches else None
+        return ''.join(out) if out else None
     
     @staticmethod
-    def _create_unified_diff(file_path, original, fixed, enhancement):
-        """Create unified diff for a file change."""
+    def _create_unified_diff(file_path, original, fixed, enhancements):
+        """Create unified diff for a file change, as a list of lines to join."""
         
         original_lines = original.splitlines(keepends=True)
         fixed_lines = fixed.splitlines(keepends=True)
         
-        # Simple diff generation
-        patch = f"""--- a/{file_path}
-+++ b/{file_path}
-@@ Enhancement: {enhancement.get('title', 'Code improvement')} @@
-"""
-        
-        # Find differences (simplified)
-        for i, (orig_line, fixed_line) in enumerate(zip(original_lines, fixed_lines)):
-            if orig_line != fixed_line:
-                patch += f"-{orig_line}"
-                patch += f"+{fixed_line}"
-        
-        # Handle additions
-        if len(fixed_lines) > len(original_lines):
-            for line in fixed_lines[len(original_lines):]:
-                patch += f"+{line}"
-        
-        return patch
+        hunks = difflib.unified_diff(
+            original_lines,
+            fixed_lines,
+            fromfile=f"a/{file_path}",
+            tofile=f"b/{file_path}",
+            n=3
+        )
+        
+        parts = [f"# Enhancement: {enhancement.get('title', 'Code improvement')}\n" for enhancement in enhancements]
+        header_len = len(parts)
+        for line in hunks:
+            # A final line without a newline would otherwise run into the next one
+            parts.append(line if line.endswith('\n') else line + '\n')
+        
+        return parts if len(parts) > header_len else []
+
+
+# DEPLOYMENT.md as a new-file patch; step/tip blocks are prebuilt "+" lines.
+_GUIDE_TEMPLATE = """--- /dev/null
++++ b/DEPLOYMENT.md
+@@ Deployment guide for {title} @@
++# Deployment to {name}
++
++**Platform:** {platform}
++
++## Steps
++
+{steps_block}+
++## Optimization Tips
++
+{tips_block}"""
 
 
 class DeploymentConfigGenerator:
@@ -264,49 +435,32 @@ class DeploymentConfigGenerator:
         patches = []
         
         for file_config in deployment_files:
-            patch = f"""--- /dev/null
+            parts = [f"""--- /dev/null
 +++ b/{file_config['full_path']}
 @@ Deployment configuration for {hosting_config.get('name', 'deployment')} @@
-"""
+"""]
             
             # Add file content as additions
-            for line in file_config['content'].splitlines():
-                patch += f"+{line}\n"
+            parts.extend(f"+{line}\n" for line in file_config['content'].splitlines())
             
-            patches.append(patch)
+            patches.append(''.join(parts))
         
         # Add environment variables documentation
-        env_patch = f"""--- /dev/null
+        env_parts = [f"""--- /dev/null
 +++ b/.env.example
 @@ Environment variables for {hosting_config.get('name', 'deployment')} @@
-"""
-        for key, value in hosting_config.get('env_vars', {}).items():
-            env_patch += f"+{key}={value}\n"
+"""]
+        env_parts.extend(f"+{key}={value}\n" for key, value in hosting_config.get('env_vars', {}).items())
         
-        patches.append(env_patch)
+        patches.append(''.join(env_parts))
         
         # Add deployment guide
-        guide_patch = f"""--- /dev/null
-+++ b/DEPLOYMENT.md
-@@ Deployment guide for {hosting_config.get('name', 'deployment')} @@
-"""
-        guide_patch += f"+# Deployment to {hosting_config.get('name', '')}\n"
-        guide_patch += f"+\n"
-        guide_patch += f"+**Platform:** {hosting_config.get('platform', '')}\n"
-        guide_patch += f"+\n"
-        guide_patch += f"+## Steps\n"
-        guide_patch += f"+\n"
-        
-        for i, step in enumerate(hosting_config.get('deployment_steps', []), 1):
-            guide_patch += f"+{i}. {step}\n"
-        
-        guide_patch += f"+\n"
-        guide_patch += f"+## Optimization Tips\n"
-        guide_patch += f"+\n"
-        
-        for tip in hosting_config.get('suggestions', []):
-            guide_patch += f"+- {tip}\n"
-        
-        patches.append(guide_patch)
+        patches.append(_GUIDE_TEMPLATE.format_map({
+            'title': hosting_config.get('name', 'deployment'),
+            'name': hosting_config.get('name', ''),
+            'platform': hosting_config.get('platform', ''),
+            'steps_block': ''.join(f"+{i}. {step}\n" for i, step in enumerate(hosting_config.get('deployment_steps', []), 1)),
+            'tips_block': ''.join(f"+- {tip}\n" for tip in hosting_config.get('suggestions', []))
+        }))
         
         return '\n'.join(patches)
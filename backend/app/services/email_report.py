@@ -2,39 +2,116 @@
 
 import smtplib
 import json
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import traceback
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
 from datetime import datetime
 from io import BytesIO
+from types import SimpleNamespace
+from collections import OrderedDict, defaultdict
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
-class PDFReportGenerator:
-    """Generate beautiful PDF reports of code analysis."""
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    _REPORTLAB_OK = True
+except ImportError:
+    # PDF reports are optional; send_report falls back to a plain-text email.
+    _REPORTLAB_OK = False
+
+# Severity -> hex colour used for issue labels in the PDF.
+SEVERITY_COLORS = {
+    'high': '#ff4444',
+    'medium': '#ff9800',
+    'low': '#ffc107'
+}
+DEFAULT_SEVERITY_COLOR = '#999'
+
+# Prebuilt label markup for the known severities.
+SEVERITY_LABELS = {
+    severity: f"<span color='{color}'><b>{severity.upper()}</b></span>"
+    for severity, color in SEVERITY_COLORS.items()
+}
+
+_STYLES = None
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+FILE_STAMP_FORMAT = '%Y%m%d_%H%M%S'
+
+# Domain part of generated Message-IDs (make_msgid would otherwise call getfqdn()).
+MESSAGE_ID_DOMAIN = os.getenv('MESSAGE_ID_DOMAIN', 'codex.local')
+
+# Rendered PDFs keyed by a hash of the analysis result, so sending the same
+# report again (another recipient, a re-download) skips the reportlab layout.
+PDF_CACHE_SIZE = 32
+# Larger reports are not kept, so the cache can't pin 32 multi-MB PDFs.
+PDF_CACHE_MAX_BYTES = 1 << 20
+_PDF_CACHE = OrderedDict()
+_PDF_CACHE_LOCK = threading.Lock()
+
+_PDF_POOL = None
+_PDF_POOL_LOCK = threading.Lock()
+
+
+def _cache_get(key):
+    with _PDF_CACHE_LOCK:
+        pdf = _PDF_CACHE.get(key)
+        if pdf is not None:
+            _PDF_CACHE.move_to_end(key)
+        return pdf
+
+
+def _cache_put(key, pdf):
+    if len(pdf) > PDF_CACHE_MAX_BYTES:
+        return
+    with _PDF_CACHE_LOCK:
+        _PDF_CACHE[key] = pdf
+        _PDF_CACHE.move_to_end(key)
+        while len(_PDF_CACHE) > PDF_CACHE_SIZE:
+            _PDF_CACHE.popitem(last=False)
+
+
+def _get_pdf_pool():
+    """Process pool for batch PDF rendering, created on first use."""
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is None:
+            # spawn, not fork: the API process runs threads (executor, SMTP sends)
+            _PDF_POOL = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 2,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _PDF_POOL
+
+
+def _get_styles():
+    """Build the shared report styles once.
     
-    @staticmethod
-    def generate_pdf_report(analysis_result):
-        """Generate PDF report from analysis results."""
-        try:
-            from reportlab.lib.pagesizes import letter, A4
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
-            from reportlab.lib import colors
-            from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-        except ImportError:
-            raise Exception("reportlab not installed. Install with: pip install reportlab")
-        
-        # Create PDF in memory
-        pdf_buffer = BytesIO()
-        doc = SimpleDocTemplate(pdf_buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-        
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
+    Returns a namespace holding the prebuilt paragraph and table styles.
+    """
+    global _STYLES
+    if _STYLES is not None:
+        return _STYLES
+    
+    if not _REPORTLAB_OK:
+        raise Exception("reportlab not installed. Install with: pip install reportlab")
+    
+    styles = getSampleStyleSheet()
+    _STYLES = SimpleNamespace(
+        TITLE_STYLE=ParagraphStyle(
             'CustomTitle',
             parent=styles['Heading1'],
             fontSize=24,
@@ -42,9 +119,8 @@ class PDFReportGenerator:
             spaceAfter=30,
             alignment=TA_CENTER,
             fontName='Helvetica-Bold'
-        )
-        
-        heading_style = ParagraphStyle(
+        ),
+        HEADING_STYLE=ParagraphStyle(
             'CustomHeading',
             parent=styles['Heading2'],
             fontSize=14,
@@ -52,14 +128,101 @@ class PDFReportGenerator:
             spaceAfter=12,
             spaceBefore=12,
             fontName='Helvetica-Bold'
-        )
-        
-        normal_style = ParagraphStyle(
+        ),
+        NORMAL_STYLE=ParagraphStyle(
             'CustomNormal',
             parent=styles['Normal'],
             fontSize=10,
             spaceAfter=6
-        )
+        ),
+        SUMMARY_TABLE_STYLE=TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0070f3')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ]),
+    )
+    return _STYLES
+
+
+class PDFReportGenerator:
+    """Generate beautiful PDF reports of code analysis."""
+    
+    @staticmethod
+    def _report_key(analysis_result):
+        data = orjson.dumps(analysis_result, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+        return hashlib.sha256(data).hexdigest()
+    
+    @staticmethod
+    def generate_pdf_report(analysis_result, now=None):
+        """Generate PDF report from analysis results.
+        
+        `now` is the report's generation time (defaults to the current time).
+        Identical results are served from a small LRU cache; a cached report
+        keeps the "Generated" timestamp of its first render.
+        """
+        key = PDFReportGenerator._report_key(analysis_result)
+        pdf = _cache_get(key)
+        if pdf is not None:
+            return pdf
+        
+        generated_at = (now or datetime.now()).strftime(TIMESTAMP_FORMAT)
+        pdf = PDFReportGenerator._render_pdf_report(analysis_result, generated_at)
+        _cache_put(key, pdf)
+        return pdf
+    
+    @staticmethod
+    def generate_pdfs_batch(results, now=None):
+        """Generate PDF reports for several analysis results in parallel.
+        
+        reportlab layout is pure-Python and holds the GIL, so uncached reports
+        are rendered across a process pool. Falls back to rendering serially
+        where worker processes can't be started.
+        
+        Returns:
+            list of PDF bytes, in the order of `results`
+        """
+        results = list(results)
+        keys = [PDFReportGenerator._report_key(r) for r in results]
+        pdfs = [_cache_get(key) for key in keys]
+        missing = [i for i, pdf in enumerate(pdfs) if pdf is None]
+        if not missing:
+            return pdfs
+        
+        generated_at = (now or datetime.now()).strftime(TIMESTAMP_FORMAT)
+        todo = [results[i] for i in missing]
+        rendered = None
+        if len(todo) > 1:
+            try:
+                rendered = list(_get_pdf_pool().map(
+                    PDFReportGenerator._render_pdf_report, todo, [generated_at] * len(todo)
+                ))
+            except (OSError, NotImplementedError, BrokenProcessPool) as e:
+                logger.warning(f"PDF process pool unavailable ({e}), rendering serially")
+        if rendered is None:
+            rendered = [PDFReportGenerator._render_pdf_report(r, generated_at) for r in todo]
+        
+        for i, pdf in zip(missing, rendered):
+            _cache_put(keys[i], pdf)
+            pdfs[i] = pdf
+        return pdfs
+    
+    @staticmethod
+    def _render_pdf_report(analysis_result, generated_at):
+        """Lay out and render the report PDF."""
+        rl = _get_styles()
+        title_style = rl.TITLE_STYLE
+        heading_style = rl.HEADING_STYLE
+        normal_style = rl.NORMAL_STYLE
+        
+        # Create PDF in memory
+        pdf_buffer = BytesIO()
+        doc = SimpleDocTemplate(pdf_buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
         
         # Build document
         elements = []
@@ -70,7 +233,7 @@ class PDFReportGenerator:
         
         # Repository Info
         repo_info = f"<b>Repository:</b> {analysis_result.get('owner', 'N/A')}/{analysis_result.get('repo', 'N/A')}<br/>" \
-                   f"<b>Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>" \
+                   f"<b>Generated:</b> {generated_at}<br/>" \
                    f"<b>Files Analyzed:</b> {len(analysis_result.get('files', []))}"
         elements.append(Paragraph(repo_info, normal_style))
         elements.append(Spacer(1, 0.3*inch))
@@ -88,17 +251,7 @@ class PDFReportGenerator:
         ]
         
         summary_table = Table(summary_data, colWidths=[2*inch, 1.5*inch, 1*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0070f3')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ]))
+        summary_table.setStyle(rl.SUMMARY_TABLE_STYLE)
         
         elements.append(summary_table)
         elements.append(Spacer(1, 0.3*inch))
@@ -108,14 +261,13 @@ class PDFReportGenerator:
             elements.append(Paragraph("🐛 Issues & Bugs Found", heading_style))
             
             for idx, issue in enumerate(issues[:10], 1):  # Limit to first 10
-                severity_color = {
-                    'high': '#ff4444',
-                    'medium': '#ff9800',
-                    'low': '#ffc107'
-                }.get(issue.get('severity', 'low'), '#999')
+                severity = issue.get('severity', 'low')
+                severity_label = SEVERITY_LABELS.get(severity)
+                if severity_label is None:
+                    severity_label = f"<span color='{DEFAULT_SEVERITY_COLOR}'><b>{severity.upper()}</b></span>"
                 
                 issue_text = f"<b>{idx}. {issue.get('title', 'Unknown')}</b><br/>" \
-                           f"<span color='{severity_color}'><b>{issue.get('severity', 'low').upper()}</b></span> | " \
+                           f"{severity_label} | " \
                            f"Type: {issue.get('type', 'N/A')} | " \
                            f"File: {issue.get('file', 'N/A')}:{issue.get('line', '?')}<br/>" \
                            f"<i>{issue.get('description', 'N/A')}</i><br/>"
@@ -132,12 +284,9 @@ class PDFReportGenerator:
         if enhancements:
             elements.append(Paragraph("💡 Code Enhancements Suggested", heading_style))
             
-            enhancement_types = {}
+            enhancement_types = defaultdict(list)
             for enh in enhancements:
-                enh_type = enh.get('type', 'other')
-                if enh_type not in enhancement_types:
-                    enhancement_types[enh_type] = []
-                enhancement_types[enh_type].append(enh)
+                enhancement_types[enh.get('type', 'other')].append(enh)
             
             for enh_type, enhs in list(enhancement_types.items())[:5]:
                 elements.append(Paragraph(f"<b>{enh_type.title()}:</b> {len(enhs)} suggestions", normal_style))
@@ -158,9 +307,11 @@ class PDFReportGenerator:
         if file_suggestions:
             elements.append(Paragraph("📁 Files Requiring Updates", heading_style))
             
-            high_priority = [f for f in file_suggestions if f.get('priority') == 'HIGH']
-            medium_priority = [f for f in file_suggestions if f.get('priority') == 'MEDIUM']
-            low_priority = [f for f in file_suggestions if f.get('priority') == 'LOW']
+            by_priority = defaultdict(list)
+            for f in file_suggestions:
+                by_priority[f.get('priority')].append(f)
+            high_priority = by_priority['HIGH']
+            medium_priority = by_priority['MEDIUM']
             
             if high_priority:
                 elements.append(Paragraph("<b>HIGH PRIORITY:</b>", normal_style))
@@ -189,12 +340,11 @@ class PDFReportGenerator:
         
         # Footer
         elements.append(Spacer(1, 0.3*inch))
-        footer_text = f"<i>Report generated by Agentic AI Code Auditor on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</i>"
+        footer_text = f"<i>Report generated by Agentic AI Code Auditor on {generated_at}</i>"
         elements.append(Paragraph(footer_text, normal_style))
         
         # Build PDF
         doc.build(elements)
-        pdf_buffer.seek(0)
         return pdf_buffer.getvalue()
 
 
@@ -214,53 +364,66 @@ class EmailReportService:
         self.server = self.smtp_config.get('server', 'smtp.gmail.com')
         self.port = self.smtp_config.get('port', 587)
     
-    def send_report(self, recipient_email, analysis_result, user_email, user_name='User'):
-        """Send analysis report via email.
+    @staticmethod
+    def _smtp_settings():
+        """Read SMTP configuration from the environment."""
+        return {
+            'server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+            'port': int(os.getenv('SMTP_PORT', '587')),
+            'sender_email': os.getenv('SENDER_EMAIL'),
+            'sender_password': os.getenv('SENDER_PASSWORD'),
+            # Passed to EHLO so smtplib doesn't do a reverse-DNS lookup per connection
+            'local_hostname': os.getenv('SMTP_LOCAL_HOSTNAME', 'localhost')
+        }
+    
+    @staticmethod
+    def _open_connection(settings):
+        """Open an authenticated SMTP connection. Caller is responsible for closing it."""
+        logger.info(f"Connecting to SMTP server {settings['server']}:{settings['port']}")
+        server = smtplib.SMTP(settings['server'], settings['port'], local_hostname=settings['local_hostname'], timeout=10)
+        try:
+            server.starttls()
+            server.login(settings['sender_email'], settings['sender_password'])
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    @staticmethod
+    def _build_headers(analysis_result, user_email, recipient_email):
+        """Headers shared by the PDF and plain-text report emails."""
+        owner = analysis_result.get('owner', 'N/A')
+        repo = analysis_result.get('repo', 'N/A')
+        return {
+            'From': user_email,
+            'To': recipient_email,
+            'Subject': f"🔍 Code Audit Report - {owner}/{repo}",
+            # Set explicitly so relays don't reject or re-stamp the message
+            'Date': formatdate(localtime=True),
+            'Message-ID': make_msgid(domain=MESSAGE_ID_DOMAIN)
+        }
+    
+    @staticmethod
+    def _build_message(recipient_email, analysis_result, pdf_content, user_email, user_name='User', now=None):
+        """Assemble the report email with the PDF attached."""
+        now = now or datetime.now()
+        msg = EmailMessage()
+        for name, value in EmailReportService._build_headers(analysis_result, user_email, recipient_email).items():
+            msg[name] = value
         
-        Args:
-            recipient_email: Email to send report to
-            analysis_result: Analysis results dict
-            user_email: Sender email (GitHub user email)
-            user_name: Display name for sender
+        # Email body
+        repo = analysis_result.get('repo', 'Repository')
+        owner = analysis_result.get('owner', 'User')
+        issues_count = len(analysis_result.get('issues', []))
+        enhancements_count = len(analysis_result.get('enhancements', []))
         
-        Returns:
-            dict with 'success' and 'message' keys
-        """
-        try:
-            logger.info(f"Attempting to send report to {recipient_email}")
-            
-            # Try to generate PDF first
-            try:
-                pdf_content = PDFReportGenerator.generate_pdf_report(analysis_result)
-                logger.info("PDF generated successfully")
-            except ImportError as e:
-                logger.warning(f"PDF generation failed: {e}, using HTML fallback")
-                # Fallback to HTML email
-                return self.send_simple_report(recipient_email, analysis_result, user_email, user_name)
-            except Exception as e:
-                logger.error(f"PDF generation error: {e}")
-                # Fallback to HTML email
-                return self.send_simple_report(recipient_email, analysis_result, user_email, user_name)
-            
-            # Create email message
-            msg = MIMEMultipart()
-            msg['From'] = user_email
-            msg['To'] = recipient_email
-            msg['Subject'] = f"🔍 Code Audit Report - {analysis_result.get('owner', 'N/A')}/{analysis_result.get('repo', 'N/A')}"
-            
-            # Email body
-            repo = analysis_result.get('repo', 'Repository')
-            owner = analysis_result.get('owner', 'User')
-            issues_count = len(analysis_result.get('issues', []))
-            enhancements_count = len(analysis_result.get('enhancements', []))
-            
-            body = f"""
+        body = f"""
 Hello,
 
 You have received a code audit report from {user_name}.
 
 Repository: {owner}/{repo}
-Analyzed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Analyzed: {now.strftime(TIMESTAMP_FORMAT)}
 
 Summary:
 - Issues Found: {issues_count}
@@ -273,34 +436,74 @@ Best regards,
 Agentic AI Code Auditor
 https://github.com
 """
+        
+        msg.set_content(body)
+        
+        # Attach PDF; base64-encoded once, straight from the rendered bytes
+        msg.add_attachment(
+            pdf_content,
+            maintype='application',
+            subtype='pdf',
+            filename=f"audit_report_{owner}_{repo}_{now.strftime(FILE_STAMP_FORMAT)}.pdf"
+        )
+        return msg
+    
+    def send_report(self, recipient_email, analysis_result, user_email, user_name='User', connection=None, pdf_content=None):
+        """Send analysis report via email.
+        
+        Args:
+            recipient_email: Email to send report to
+            analysis_result: Analysis results dict
+            user_email: Sender email (GitHub user email)
+            user_name: Display name for sender
+            connection: Optional already-open, logged-in smtplib.SMTP to send on.
+                When None a connection is opened and closed for this message.
+            pdf_content: Optional prerendered PDF to attach; rendered here when None.
+        
+        Returns:
+            dict with 'success' and 'message' keys
+        """
+        try:
+            logger.info(f"Attempting to send report to {recipient_email}")
             
-            msg.attach(MIMEText(body, 'plain'))
+            if not _REPORTLAB_OK:
+                return self.send_simple_report(recipient_email, analysis_result, user_email, user_name)
             
-            # Attach PDF
-            pdf_attachment = MIMEApplication(pdf_content)
-            pdf_attachment.add_header('Content-Disposition', 'attachment', 
-                                     filename=f"audit_report_{owner}_{repo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
-            msg.attach(pdf_attachment)
+            now = datetime.now()
             
-            # Send email - use environment variables for configuration
-            smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-            smtp_port = int(os.getenv('SMTP_PORT', '587'))
-            sender_email = os.getenv('SENDER_EMAIL')
-            sender_password = os.getenv('SENDER_PASSWORD')
+            # Try to generate PDF first
+            if pdf_content is None:
+                try:
+                    pdf_content = PDFReportGenerator.generate_pdf_report(analysis_result, now)
+                    logger.info("PDF generated successfully")
+                except ImportError as e:
+                    logger.warning(f"PDF generation failed: {e}, using HTML fallback")
+                    # Fallback to HTML email
+                    return self.send_simple_report(recipient_email, analysis_result, user_email, user_name)
+                except Exception as e:
+                    logger.error(f"PDF generation error: {e}")
+                    # Fallback to HTML email
+                    return self.send_simple_report(recipient_email, analysis_result, user_email, user_name)
             
-            if not sender_email or not sender_password:
-                logger.warning("SMTP credentials not configured, using mock send")
-                logger.info(f"Mock: Would send email to {recipient_email}")
-                return {
-                    'success': True,
-                    'message': f'Report prepared for {recipient_email} (Note: Email sending requires SMTP configuration)'
-                }
+            # Create email message
+            msg = self._build_message(recipient_email, analysis_result, pdf_content, user_email, user_name, now)
             
-            logger.info(f"Connecting to SMTP server {smtp_server}:{smtp_port}")
-            with smtplib.SMTP(smtp_server, smtp_port, timeout=10) as server:
-                server.starttls()
-                server.login(sender_email, sender_password)
-                server.send_message(msg)
+            if connection is not None:
+                connection.send_message(msg)
+            else:
+                # Send email - use environment variables for configuration
+                settings = self._smtp_settings()
+                
+                if not settings['sender_email'] or not settings['sender_password']:
+                    logger.warning("SMTP credentials not configured, using mock send")
+                    logger.info(f"Mock: Would send email to {recipient_email}")
+                    return {
+                        'success': True,
+                        'message': f'Report prepared for {recipient_email} (Note: Email sending requires SMTP configuration)'
+                    }
+                
+                with self._open_connection(settings) as server:
+                    server.send_message(msg)
             
             logger.info(f"Report sent successfully to {recipient_email}")
             return {
@@ -327,16 +530,53 @@ https://github.com
                 'message': f'Error: {str(e)}'
             }
     
+    def send_reports_bulk(self, jobs):
+        """Send several reports over a single SMTP connection.
+        
+        Args:
+            jobs: Iterable of dicts with send_report's keyword arguments
+                (recipient_email, analysis_result, user_email, optional user_name)
+        
+        Returns:
+            list of send_report result dicts, in the order of `jobs`
+        """
+        jobs = list(jobs)
+        settings = self._smtp_settings()
+        
+        if not settings['sender_email'] or not settings['sender_password']:
+            # No connection to share; send_report reports the mock send per job.
+            return [self.send_report(**job) for job in jobs]
+        
+        # Render all PDFs up front, in parallel; send_report renders (or falls
+        # back to plain text) for any job left without one.
+        pdfs = [None] * len(jobs)
+        if _REPORTLAB_OK:
+            try:
+                pdfs = PDFReportGenerator.generate_pdfs_batch(job['analysis_result'] for job in jobs)
+            except Exception as e:
+                logger.error(f"Batch PDF generation error: {e}")
+        
+        try:
+            server = self._open_connection(settings)
+        except smtplib.SMTPAuthenticationError as e:
+            logger.error(f"SMTP authentication failed: {e}")
+            return [{'success': False, 'message': 'Email authentication failed. Check SMTP credentials.'} for _ in jobs]
+        except (smtplib.SMTPException, OSError) as e:
+            logger.error(f"SMTP error: {e}")
+            return [{'success': False, 'message': f'Email server error: {str(e)}'} for _ in jobs]
+        
+        with server:
+            return [self.send_report(**job, connection=server, pdf_content=pdf) for job, pdf in zip(jobs, pdfs)]
+    
     @staticmethod
     def send_simple_report(recipient_email, analysis_result, user_email, user_name='User'):
         """Send report without PDF (fallback method)."""
         try:
             logger.info(f"Attempting to send simple HTML report to {recipient_email}")
             
-            msg = MIMEMultipart('alternative')
-            msg['From'] = user_email
-            msg['To'] = recipient_email
-            msg['Subject'] = f"🔍 Code Audit Report - {analysis_result.get('owner', 'N/A')}/{analysis_result.get('repo', 'N/A')}"
+            msg = EmailMessage()
+            for name, value in EmailReportService._build_headers(analysis_result, user_email, recipient_email).items():
+                msg[name] = value
             
             repo = analysis_result.get('repo', 'Repository')
             owner = analysis_result.get('owner', 'User')
@@ -348,7 +588,7 @@ https://github.com
 CODE AUDIT REPORT
 {owner}/{repo}
 
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Generated: {datetime.now().strftime(TIMESTAMP_FORMAT)}
 
 SUMMARY:
 - Issues Found: {len(issues)}
@@ -364,25 +604,19 @@ ENHANCEMENTS:
 Generated by Agentic AI Code Auditor
 """
             
-            msg.attach(MIMEText(text_body, 'plain'))
+            msg.set_content(text_body)
             
             # Try to send with SMTP
-            smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-            smtp_port = int(os.getenv('SMTP_PORT', '587'))
-            sender_email = os.getenv('SENDER_EMAIL')
-            sender_password = os.getenv('SENDER_PASSWORD')
+            settings = EmailReportService._smtp_settings()
             
-            if not sender_email or not sender_password:
+            if not settings['sender_email'] or not settings['sender_password']:
                 logger.warning("SMTP credentials not configured for HTML email")
                 return {
                     'success': True,
                     'message': f'Report prepared (requires SMTP configuration to send to {recipient_email})'
                 }
             
-            logger.info(f"Connecting to SMTP server {smtp_server}:{smtp_port} for HTML email")
-            with smtplib.SMTP(smtp_server, smtp_port, timeout=10) as server:
-                server.starttls()
-                server.login(sender_email, sender_password)
+            with EmailReportService._open_connection(settings) as server:
                 server.send_message(msg)
             
             logger.info(f"HTML report sent successfully to {recipient_email}")
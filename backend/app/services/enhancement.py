@@ -2,9 +2,126 @@
 Analyzes code for improvement opportunities beyond bugs.
 Suggests refactoring, performance optimization, best practices, etc.
 """
-import json
+import os
 import textwrap
 import re
+import logging
+import threading
+import multiprocessing
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from itertools import chain
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Analyze in worker processes once a scan has at least this many files;
+# below that, pickling the contents costs more than it saves.
+PARALLEL_MIN_FILES = 64
+_POOL = None
+_POOL_LOCK = threading.Lock()
+_WORKER_ANALYZER = None
+
+# Fixed needles each language check looks for, matched together in one pass
+# per file; see _scan().
+_PY_MARKERS = re.compile(r'for |\.append\(|def |"""')
+_JS_MARKERS = re.compile(r'console\.log|var ')
+_VAR_RE = re.compile(r'\bvar\s+')
+_NEWLINE_RE = re.compile(r'\n')
+_BLANK_RE = re.compile(r'\s+')
+_LINE_COMMENT_RE = re.compile(r'\s*//')
+# A line with an assignment whose last non-blank character isn't ';', '{', '}'
+# or the end of a '*/' comment, skipping import/export and commented lines.
+_MISSING_SEMICOLON_RE = re.compile(
+    r'^(?=[^\n]*=)(?![^\n]*(?:import|export|//))[^\n]*[^;{}\s](?<!\*/)[^\S\n]*$',
+    re.MULTILINE
+)
+
+
+def _scan(pattern, content):
+    """Map each needle matched by `pattern` to the offsets it occurs at."""
+    hits = defaultdict(list)
+    for m in pattern.finditer(content):
+        hits[m.group()].append(m.start())
+    return hits
+
+
+def _get_pool():
+    """Process pool for enhancement analysis, created on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # spawn, not fork: the API process runs threads
+            _POOL = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 2,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _POOL
+
+
+def _discard_pool():
+    """Drop a broken pool so the next large scan starts a fresh one."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _analyze_file(file_obj):
+    """Worker entry point: analyze one file with a per-process analyzer."""
+    global _WORKER_ANALYZER
+    if _WORKER_ANALYZER is None:
+        _WORKER_ANALYZER = CodeEnhancementAnalyzer()
+    return _WORKER_ANALYZER.analyze_file(file_obj)
+
+
+@dataclass(slots=True)
+class _FileIndex:
+    """A file's content plus the offsets of its newlines, computed once per file.
+    
+    Checks map match offsets to line numbers through the offset array, which
+    is built lazily on first use, and test line spans in place with
+    `pattern.match(content, start, end)` rather than slicing lines out.
+    """
+    content: str
+    _newlines: array = field(default=None, init=False, repr=False)
+    
+    @property
+    def newlines(self):
+        if self._newlines is None:
+            self._newlines = array('i', [m.start() for m in _NEWLINE_RE.finditer(self.content)])
+        return self._newlines
+    
+    @property
+    def line_count(self):
+        content = self.content
+        return len(self.newlines) + (1 if content and not content.endswith('\n') else 0)
+    
+    def line_of(self, pos):
+        """0-based line number of offset `pos`."""
+        return bisect_left(self.newlines, pos)
+    
+    def line_start(self, idx):
+        return self.newlines[idx - 1] + 1 if idx > 0 else 0
+    
+    def line_end(self, idx):
+        """Offset of line `idx`'s newline (or the end of the content)."""
+        return self.newlines[idx] if idx < len(self.newlines) else len(self.content)
+    
+    def hit_lines(self, offsets):
+        """Distinct 0-based line numbers of `offsets`, in order."""
+        lines = []
+        for pos in offsets:
+            idx = self.line_of(pos)
+            if not lines or lines[-1] != idx:
+                lines.append(idx)
+        return lines
+
 
 class CodeEnhancementAnalyzer:
     """Suggests code improvements and enhancements."""
@@ -19,34 +136,63 @@ class CodeEnhancementAnalyzer:
             'documentation',
             'testing'
         ]
+        # File extension -> check
+        self._dispatch = {
+            '.py': self._check_python,
+            '.js': self._check_javascript,
+            '.jsx': self._check_javascript,
+            '.json': self._check_json
+        }
     
     def analyze_enhancements(self, files):
-        """Analyze files for enhancement opportunities."""
-        enhancements = []
+        """Analyze files for enhancement opportunities.
         
-        for file_obj in files:
-            path = file_obj.get('path', '')
-            content = file_obj.get('content', '')
-            
-            # Check file type and apply relevant checks
-            if path.endswith('.py'):
-                enhancements.extend(self._check_python(path, content))
-            elif path.endswith('.js') or path.endswith('.jsx'):
-                enhancements.extend(self._check_javascript(path, content))
-            elif path.endswith('.json'):
-                enhancements.extend(self._check_json(path, content))
+        Large file sets are spread across a process pool, since the checks
+        are pure-Python and hold the GIL.
+        """
+        dispatch = self._dispatch
+        files = [f for f in files if os.path.splitext(f.get('path', ''))[1] in dispatch]
+        
+        if len(files) >= PARALLEL_MIN_FILES and (os.cpu_count() or 1) > 1:
+            try:
+                results = _get_pool().map(_analyze_file, files, chunksize=16)
+                return list(chain.from_iterable(results))
+            except (OSError, NotImplementedError, BrokenProcessPool) as e:
+                logger.warning(f"Enhancement process pool unavailable ({e}), analyzing serially")
+                _discard_pool()
         
+        enhancements = []
+        for file_obj in files:
+            enhancements.extend(self.analyze_file(file_obj))
         return enhancements
     
-    def _check_python(self, path, content):
+    def analyze_file(self, file_obj):
+        """Run the check matching one file's extension."""
+        path = file_obj.get('path', '')
+        check = self._dispatch.get(os.path.splitext(path)[1])
+        if check is None:
+            return []
+        return check(path, _FileIndex(file_obj.get('content', '')))
+    
+    def _check_python(self, path, index):
         """Check Python files for enhancements."""
         enhancements = []
-        lines = content.splitlines()
+        content = index.content
+        hits = _scan(_PY_MARKERS, content)
         
         # Performance: Check for inefficient loops
-        if 'for ' in content and '.append(' in content:
-            for idx, line in enumerate(lines):
-                if 'for ' in line and any(lines[i].__contains__('.append(') for i in range(idx, min(idx+5, len(lines)))):
+        if hits['for '] and hits['.append(']:
+            append_lines = index.hit_lines(hits['.append('])
+            k = 0
+            for idx in index.hit_lines(hits['for ']):
+                # Both lists ascend, so the first append at or after this loop
+                # line is found by advancing one shared cursor.
+                while k < len(append_lines) and append_lines[k] < idx:
+                    k += 1
+                if k == len(append_lines):
+                    break
+                # An append on this line or one of the next four
+                if append_lines[k] < idx + 5:
                     enhancements.append({
                         'title': 'Use list comprehension instead of loop',
                         'description': f'Line {idx+1}: Consider replacing loop+append with list comprehension for better performance',
@@ -58,66 +204,72 @@ class CodeEnhancementAnalyzer:
                     })
                     break
         
-        # Best practices: Check for missing docstrings
-        if 'def ' in content and '"""' not in content:
-            for idx, line in enumerate(lines):
-                if line.strip().startswith('def ') and idx > 0:
-                    if '"""' not in lines[idx+1]:
-                        enhancements.append({
-                            'title': 'Missing function docstring',
-                            'description': f'Function at line {idx+1} lacks documentation',
-                            'file': path,
-                            'line': idx + 1,
-                            'type': 'documentation',
-                            'severity': 'low',
-                            'suggestion': 'Add docstring with function description, args, and return value'
-                        })
+        # `def ` hits that open their line (after indentation)
+        def_lines = []
+        top_level_defs = []
+        for pos in hits['def ']:
+            idx = index.line_of(pos)
+            start = index.line_start(idx)
+            if start == pos:
+                top_level_defs.append(idx)
+            if start == pos or _BLANK_RE.fullmatch(content, start, pos):
+                def_lines.append(idx)
         
-        # Maintainability: Check for long functions
-        func_lines = 0
-        for idx, line in enumerate(lines):
-            if line.startswith('def '):
-                func_lines = 0
-            else:
-                func_lines += 1
-                if func_lines > 50 and not line.strip().startswith('def '):
-                    if idx < len(lines) - 1:
-                        continue
+        # Best practices: Check for missing docstrings
+        if def_lines and not hits['"""']:
+            for idx in def_lines:
+                if idx > 0:
                     enhancements.append({
-                        'title': 'Long function detected',
-                        'description': f'Function starting around line {idx-50} has many lines',
+                        'title': 'Missing function docstring',
+                        'description': f'Function at line {idx+1} lacks documentation',
                         'file': path,
-                        'line': idx - 50,
-                        'type': 'maintainability',
-                        'severity': 'medium',
-                        'suggestion': 'Consider breaking into smaller functions'
+                        'line': idx + 1,
+                        'type': 'documentation',
+                        'severity': 'low',
+                        'suggestion': 'Add docstring with function description, args, and return value'
                     })
         
+        # Maintainability: Check for long functions. Only the stretch after the
+        # last top-level def, up to the end of the file, is measured.
+        line_count = index.line_count
+        last = line_count - 1
+        if last >= 0 and (not def_lines or def_lines[-1] != last):
+            func_lines = last - top_level_defs[-1] if top_level_defs else line_count
+            if func_lines > 50:
+                enhancements.append({
+                    'title': 'Long function detected',
+                    'description': f'Function starting around line {last-50} has many lines',
+                    'file': path,
+                    'line': last - 50,
+                    'type': 'maintainability',
+                    'severity': 'medium',
+                    'suggestion': 'Consider breaking into smaller functions'
+                })
+        
         return enhancements
     
-    def _check_javascript(self, path, content):
+    def _check_javascript(self, path, index):
         """Check JavaScript files for enhancements."""
         enhancements = []
-        lines = content.splitlines()
+        content = index.content
+        hits = _scan(_JS_MARKERS, content)
         
         # Performance: Check for console.log in production
-        if 'console.log' in content:
-            for idx, line in enumerate(lines):
-                if 'console.log' in line:
-                    enhancements.append({
-                        'title': 'Remove console.log for production',
-                        'description': f'Line {idx+1}: Debug logging should be removed before deployment',
-                        'file': path,
-                        'line': idx + 1,
-                        'type': 'performance',
-                        'severity': 'low',
-                        'suggestion': 'Remove or use proper logging library'
-                    })
+        for idx in index.hit_lines(hits['console.log']):
+            enhancements.append({
+                'title': 'Remove console.log for production',
+                'description': f'Line {idx+1}: Debug logging should be removed before deployment',
+                'file': path,
+                'line': idx + 1,
+                'type': 'performance',
+                'severity': 'low',
+                'suggestion': 'Remove or use proper logging library'
+            })
         
         # Best practices: Check for var usage
-        if re.search(r'\bvar\s+', content):
-            for idx, line in enumerate(lines):
-                if 'var ' in line and not line.strip().startswith('//'):
+        if hits['var '] and _VAR_RE.search(content):
+            for idx in index.hit_lines(hits['var ']):
+                if not _LINE_COMMENT_RE.match(content, index.line_start(idx), index.line_end(idx)):
                     enhancements.append({
                         'title': 'Use const/let instead of var',
                         'description': f'Line {idx+1}: var has function scope, use const/let for block scope',
@@ -128,55 +280,61 @@ class CodeEnhancementAnalyzer:
                         'suggestion': 'Replace var with const or let'
                     })
         
-        # Style: Check for missing semicolons
-        for idx, line in enumerate(lines):
-            stripped = line.rstrip()
-            if stripped and not stripped.endswith((';', '{', '}', '//', '*/')) and '=' in line:
-                if not any(x in line for x in ['import', 'export', '//']):
-                    enhancements.append({
-                        'title': 'Missing semicolon',
-                        'description': f'Line {idx+1}: JavaScript line should end with semicolon',
-                        'file': path,
-                        'line': idx + 1,
-                        'type': 'style',
-                        'severity': 'low',
-                        'suggestion': 'Add semicolon at end of line'
-                    })
+        # Style: Check for missing semicolons. Only lines with an '=' qualify,
+        # so skip files without one and start at the line of the first.
+        eq = content.find('=')
+        if eq >= 0:
+            start = content.rfind('\n', 0, eq) + 1
+            for m in _MISSING_SEMICOLON_RE.finditer(content, start):
+                idx = index.line_of(m.start())
+                enhancements.append({
+                    'title': 'Missing semicolon',
+                    'description': f'Line {idx+1}: JavaScript line should end with semicolon',
+                    'file': path,
+                    'line': idx + 1,
+                    'type': 'style',
+                    'severity': 'low',
+                    'suggestion': 'Add semicolon at end of line'
+                })
         
         return enhancements
     
-    def _check_json(self, path, content):
+    def _check_json(self, path, index):
         """Check JSON files for enhancements."""
         enhancements = []
         
+        # Only package.json is checked; don't parse lockfiles and other data.
+        if 'package.json' not in path:
+            return enhancements
+        
         try:
-            data = json.loads(content)
+            data = orjson.loads(index.content)
             
             # Check for missing scripts in package.json
-            if 'package.json' in path:
-                scripts = data.get('scripts', {})
-                if 'lint' not in scripts:
-                    enhancements.append({
-                        'title': 'Add lint script',
-                        'description': 'package.json missing lint script for code quality checks',
-                        'file': path,
-                        'line': 1,
-                        'type': 'best-practices',
-                        'severity': 'low',
-                        'suggestion': 'Add "lint": "eslint ." to scripts'
-                    })
-                
-                if 'test' not in scripts:
-                    enhancements.append({
-                        'title': 'Add test script',
-                        'description': 'package.json missing test script',
-                        'file': path,
-                        'line': 1,
-                        'type': 'best-practices',
-                        'severity': 'medium',
-                        'suggestion': 'Add "test": "jest" to scripts'
-                    })
-        except:
+            scripts = data.get('scripts', {})
+            if 'lint' not in scripts:
+                enhancements.append({
+                    'title': 'Add lint script',
+                    'description': 'package.json missing lint script for code quality checks',
+                    'file': path,
+                    'line': 1,
+                    'type': 'best-practices',
+                    'severity': 'low',
+                    'suggestion': 'Add "lint": "eslint ." to scripts'
+                })
+            
+            if 'test' not in scripts:
+                enhancements.append({
+                    'title': 'Add test script',
+                    'description': 'package.json missing test script',
+                    'file': path,
+                    'line': 1,
+                    'type': 'best-practices',
+                    'severity': 'medium',
+                    'suggestion': 'Add "test": "jest" to scripts'
+                })
+        except (orjson.JSONDecodeError, AttributeError, TypeError):
+            # Not valid JSON, or not shaped like a package.json
             pass
         
         return enhancements
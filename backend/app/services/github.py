@@ -1,9 +1,16 @@
-import requests
+import tempfile
+from app.utils.http import create_session, DEFAULT_TIMEOUT
 GITHUB_API = 'https://api.github.com'
+ZIP_CHUNK_SIZE = 1 << 20
+ZIP_SPOOL_MAX_SIZE = 32 << 20
+
+# Shared by every GitHubService instance so connections stay alive across
+# instances. Only the token varies per instance; it is sent per request.
+SESSION = create_session(headers={"Accept": "application/vnd.github.v3+json"})
 class GitHubService:
     def __init__(self, token: str):
         self.token = token
-        self.headers = { "Authorization": f"token {token}", "Accept": "application/vnd.github.v3+json" }
+        self.headers = {"Authorization": f"token {token}"}
     def parse_repo_url(self, url: str):
         """
         Parse GitHub URL or owner/repo format.
@@ -27,19 +34,36 @@ class GitHubService:
             parts = url.split('/')
             return parts[0], parts[1]
     def download_repo_zip(self, owner, repo):
+        """Stream the repo zipball into a spooled temp file and return it rewound.
+
+        Small archives stay in memory; large ones spill to disk instead of being
+        buffered whole. The caller owns (and should close) the returned file.
+        """
         url = f"{GITHUB_API}/repos/{owner}/{repo}/zipball"
-        r = requests.get(url, headers=self.headers)
-        r.raise_for_status()
-        return r.content
+        archive = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_SIZE)
+        try:
+            with SESSION.get(url, headers=self.headers, stream=True, timeout=DEFAULT_TIMEOUT) as r:
+                r.raise_for_status()
+                # Known-large archives go straight to disk rather than filling
+                # the memory buffer first and copying it over at rollover.
+                if int(r.headers.get('Content-Length') or 0) > ZIP_SPOOL_MAX_SIZE:
+                    archive.rollover()
+                for chunk in r.iter_content(chunk_size=ZIP_CHUNK_SIZE):
+                    archive.write(chunk)
+        except Exception:
+            archive.close()
+            raise
+        archive.seek(0)
+        return archive
     def create_issue(self, owner, repo, title, body):
         url = f"{GITHUB_API}/repos/{owner}/{repo}/issues"
         data = {"title": title, "body": body}
-        r = requests.post(url, headers=self.headers, json=data)
+        r = SESSION.post(url, headers=self.headers, json=data, timeout=DEFAULT_TIMEOUT)
         r.raise_for_status()
         return r.json().get('html_url')
     def create_pull_request(self, owner, repo, head, base, title, body):
         url = f"{GITHUB_API}/repos/{owner}/{repo}/pulls"
         data = {"title": title, "head": head, "base": base, "body": body}
-        r = requests.post(url, headers=self.headers, json=data)
+        r = SESSION.post(url, headers=self.headers, json=data, timeout=DEFAULT_TIMEOUT)
         r.raise_for_status()
         return r.json().get('html_url')
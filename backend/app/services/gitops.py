@@ -1,24 +1,53 @@
-import tempfile, shutil, os
+import tempfile, shutil, os, errno
 from git import Repo
+from git.exc import GitCommandError
+from app.services.github import GitHubService
 from app.utils.patch import apply_unified_diff
 from uuid import uuid4
+
+# Clone into tmpfs when the host has one with room to spare, so git's object
+# I/O stays in RAM. Docker caps /dev/shm at 64 MB by default, which is below
+# SHM_MIN_FREE, so containers use the regular temp dir unless configured.
+# Setting GITOPS_TMPDIR picks the clone directory explicitly.
+_SHM = '/dev/shm'
+SHM_MIN_FREE = int(os.getenv('GITOPS_SHM_MIN_FREE', str(512 * 1024 * 1024)))
+
+def _clone_tmpdir():
+    """Parent directory for a clone; None means the system temp dir."""
+    override = os.getenv('GITOPS_TMPDIR')
+    if override:
+        return override
+    try:
+        if os.access(_SHM, os.W_OK) and shutil.disk_usage(_SHM).free >= SHM_MIN_FREE:
+            return _SHM
+    except OSError:
+        pass
+    return None
+
+def _out_of_space(exc):
+    if isinstance(exc, OSError):
+        return exc.errno == errno.ENOSPC
+    return 'No space left on device' in str(exc)
+
 class GitOps:
     def __init__(self, token: str = None):
         self.token = token
     def create_pr_from_patch(self, owner, repo, patch, base_branch='main', title=None, description=None):
         clone_url = f"https://{self.token}@github.com/{owner}/{repo}.git" if self.token else f"https://github.com/{owner}/{repo}.git"
-        tmpdir = tempfile.mkdtemp()
+        commit_message = title or 'AI: apply automated fixes'
+        parent = _clone_tmpdir()
+        tmpdir = tempfile.mkdtemp(dir=parent)
         try:
-            repo_obj = Repo.clone_from(clone_url, tmpdir)
-            new_branch = f"ai-fix-{uuid4().hex[:8]}"
-            repo_obj.git.checkout('-b', new_branch)
-            apply_unified_diff(tmpdir, patch)
-            repo_obj.git.add(all=True)
-            
-            commit_message = title or 'AI: apply automated fixes'
-            repo_obj.index.commit(commit_message)
+            try:
+                repo_obj, new_branch = self._commit_patch(clone_url, tmpdir, base_branch, patch, commit_message)
+            except (OSError, GitCommandError) as e:
+                # A repo too big for the tmpfs: start over once on disk
+                if parent != _SHM or not _out_of_space(e):
+                    raise
+                shutil.rmtree(tmpdir, ignore_errors=True)
+                tmpdir = tempfile.mkdtemp()
+                repo_obj, new_branch = self._commit_patch(clone_url, tmpdir, base_branch, patch, commit_message)
             repo_obj.remotes.origin.push(refspec=f"{new_branch}:{new_branch}")
-            from app.services.github import GitHubService
             gh = GitHubService(self.token)
             pr_title = title or 'AI: automated fixes'
             pr_body = description or 'Automated fixes by AI'
@@ -29,3 +58,18 @@ class GitOps:
                 shutil.rmtree(tmpdir)
             except Exception:
                 pass
+
+    @staticmethod
+    def _commit_patch(clone_url, tmpdir, base_branch, patch, commit_message):
+        """Clone into `tmpdir`, apply `patch` on a new branch and commit it; returns (repo, branch)."""
+        # Only the tip of the base branch is needed to apply a patch on top.
+        repo_obj = Repo.clone_from(
+            clone_url, tmpdir,
+            multi_options=['--depth=1', '--single-branch', f'--branch={base_branch}', '--no-tags']
+        )
+        new_branch = f"ai-fix-{uuid4().hex[:8]}"
+        repo_obj.git.checkout('-b', new_branch)
+        apply_unified_diff(tmpdir, patch)
+        repo_obj.git.add(all=True)
+        repo_obj.index.commit(commit_message)
+        return repo_obj, new_branch
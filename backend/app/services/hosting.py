@@ -1,4 +1,43 @@
 """Hosting provider configuration and deployment suggestion service."""
+import functools
+
+# Config file templates are static; each provider hands out the same
+# read-only tuple instead of rebuilding the list and its strings per call.
+_VERCEL_JSON = '''{
+  "buildCommand": "npm run build",
+  "devCommand": "npm run dev",
+  "env": {
+    "NEXT_PUBLIC_API_URL": "@api_url"
+  },
+  "rewrites": [
+    {
+      "source": "/api/(.*)",
+      "destination": "http://localhost:8000/api/$1"
+    }
+  ]
+}'''
+
+_HEROKU_PROCFILE = '''web: python -m uvicorn app.main:app --host 0.0.0.0 --port $PORT
+release: alembic upgrade head'''
+
+_RAILWAY_TOML = '''[build]
+builder = "nixpacks"
+
+[deploy]
+startCommand = "python -m uvicorn app.main:app --host 0.0.0.0 --port $PORT"
+'''
+
+_VERCEL_CONFIG_FILES = (
+    {'name': 'vercel.json', 'location': 'root', 'content': _VERCEL_JSON},
+)
+_HEROKU_CONFIG_FILES = (
+    {'name': 'Procfile', 'location': 'root', 'content': _HEROKU_PROCFILE},
+    {'name': 'runtime.txt', 'location': 'root', 'content': 'python-3.11.7'},
+)
+_RAILWAY_CONFIG_FILES = (
+    {'name': 'railway.toml', 'location': 'root', 'content': _RAILWAY_TOML},
+)
+
 
 class HostingProvider:
     """Base hosting provider configuration."""
@@ -8,8 +47,8 @@ class HostingProvider:
         self.platform = platform
     
     def get_config_files(self):
-        """Return list of config files needed for this provider."""
-        return []
+        """Return the config files needed for this provider (treat as read-only)."""
+        return ()
     
     def get_env_vars(self):
         """Return required environment variables."""
@@ -31,25 +70,7 @@ class VercelProvider(HostingProvider):
         super().__init__("Vercel", "Frontend + Backend")
     
     def get_config_files(self):
-        return [
-            {
-                'name': 'vercel.json',
-                'location': 'root',
-                'content': '''{
-  "buildCommand": "npm run build",
-  "devCommand": "npm run dev",
-  "env": {
-    "NEXT_PUBLIC_API_URL": "@api_url"
-  },
-  "rewrites": [
-    {
-      "source": "/api/(.*)",
-      "destination": "http://localhost:8000/api/$1"
-    }
-  ]
-}'''
-            }
-        ]
+        return _VERCEL_CONFIG_FILES
     
     def get_env_vars(self):
         return {
@@ -83,19 +104,7 @@ class HerokuProvider(HostingProvider):
         super().__init__("Heroku", "Full Stack")
     
     def get_config_files(self):
-        return [
-            {
-                'name': 'Procfile',
-                'location': 'root',
-                'content': '''web: python -m uvicorn app.main:app --host 0.0.0.0 --port $PORT
-release: alembic upgrade head'''
-            },
-            {
-                'name': 'runtime.txt',
-                'location': 'root',
-                'content': 'python-3.11.7'
-            }
-        ]
+        return _HEROKU_CONFIG_FILES
     
     def get_env_vars(self):
         return {
@@ -131,18 +140,7 @@ class RailwayProvider(HostingProvider):
         super().__init__("Railway", "Full Stack")
     
     def get_config_files(self):
-        return [
-            {
-                'name': 'railway.toml',
-                'location': 'root',
-                'content': '''[build]
-builder = "nixpacks"
-
-[deploy]
-startCommand = "python -m uvicorn app.main:app --host 0.0.0.0 --port $PORT"
-'''
-            }
-        ]
+        return _RAILWAY_CONFIG_FILES
     
     def get_env_vars(self):
         return {
@@ -177,7 +175,33 @@ class HostingManager:
         'railway': RailwayProvider()
     }
     
+    SUGGESTIONS = {
+        'full-stack': {
+            'recommended': 'railway',
+            'reason': 'Best for full-stack with built-in PostgreSQL',
+            'alternatives': ['heroku', 'vercel']
+        },
+        'frontend-only': {
+            'recommended': 'vercel',
+            'reason': 'Optimized for Next.js applications',
+            'alternatives': []
+        },
+        'backend-only': {
+            'recommended': 'railway',
+            'reason': 'Simple deployment with automatic scaling',
+            'alternatives': ['heroku']
+        },
+        'serverless': {
+            'recommended': 'railway',
+            'reason': 'Modern alternative with automatic scaling',
+            'alternatives': ['heroku']
+        }
+    }
+    
+    # Provider configs are static, so lookups are memoized. Callers must treat
+    # the returned dicts as read-only.
     @classmethod
+    @functools.lru_cache(maxsize=1)
     def get_all_providers(cls):
         """Get all available hosting providers."""
         return {
@@ -195,43 +219,10 @@ class HostingManager:
     @classmethod
     def get_provider(cls, provider_name: str):
         """Get specific provider configuration."""
-        provider = cls.PROVIDERS.get(provider_name.lower())
-        if not provider:
-            return None
-        
-        return {
-            'name': provider.name,
-            'platform': provider.platform,
-            'config_files': provider.get_config_files(),
-            'env_vars': provider.get_env_vars(),
-            'deployment_steps': provider.get_deployment_steps(),
-            'suggestions': provider.get_suggestions()
-        }
+        # Served from the memoized full listing, whatever the name's casing.
+        return cls.get_all_providers().get(provider_name.lower())
     
     @classmethod
     def suggest_provider(cls, project_type='full-stack'):
         """Suggest best hosting provider based on project type."""
-        suggestions = {
-            'full-stack': {
-                'recommended': 'railway',
-                'reason': 'Best for full-stack with built-in PostgreSQL',
-                'alternatives': ['heroku', 'vercel']
-            },
-            'frontend-only': {
-                'recommended': 'vercel',
-                'reason': 'Optimized for Next.js applications',
-                'alternatives': []
-            },
-            'backend-only': {
-                'recommended': 'railway',
-                'reason': 'Simple deployment with automatic scaling',
-                'alternatives': ['heroku']
-            },
-            'serverless': {
-                'recommended': 'railway',
-                'reason': 'Modern alternative with automatic scaling',
-                'alternatives': ['heroku']
-            }
-        }
-        
-        return suggestions.get(project_type, suggestions['full-stack'])
+        return cls.SUGGESTIONS.get(project_type, cls.SUGGESTIONS['full-stack'])
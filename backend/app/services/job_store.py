@@ -0,0 +1,126 @@
+"""In-memory job registry with bounded size and TTL expiry."""
+import gzip
+import time
+import threading
+from collections import OrderedDict
+import orjson
+
+# Results are stored as JSON bytes; payloads above this size are gzipped.
+COMPRESS_THRESHOLD = 16 * 1024
+
+
+def _json_default(obj):
+    # LangChain messages (agent_messages) are pydantic models.
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    if hasattr(obj, 'dict'):
+        return obj.dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def encode_result(result):
+    """Serialize a result dict to (compressed, bytes), gzipping large payloads."""
+    data = orjson.dumps(result, default=_json_default)
+    if len(data) > COMPRESS_THRESHOLD:
+        return True, gzip.compress(data, compresslevel=6)
+    return False, data
+
+
+def decode_result(blob):
+    compressed, data = blob
+    return orjson.loads(gzip.decompress(data) if compressed else data)
+
+
+class _JobShard:
+    """One independently locked partition of the job store."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def create(self, job_id, record):
+        with self.lock:
+            record['updated_at'] = time.monotonic()
+            self.jobs[job_id] = record
+            self.jobs.move_to_end(job_id)
+            self._evict()
+
+    def update(self, job_id, **fields):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                # Already expired or evicted; nobody can read it anymore.
+                return
+            job.update(fields)
+            job['updated_at'] = time.monotonic()
+            self.jobs.move_to_end(job_id)
+
+    def get(self, job_id, field=None):
+        """Return a shallow copy of the record, or one field of it."""
+        with self.lock:
+            self._evict()
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+            return job.get(field) if field else dict(job)
+
+    def _evict(self):
+        """Drop expired jobs and trim to maxsize. Caller must hold the lock."""
+        deadline = time.monotonic() - self.ttl
+        while self.jobs:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest['updated_at'] >= deadline and len(self.jobs) <= self.maxsize:
+                break
+            del self.jobs[oldest_id]
+
+
+class JobStore:
+    """Bounded, TTL'd store for analysis job state.
+
+    Jobs expire `ttl` seconds after their last update, and the least recently
+    updated jobs are evicted once more than `maxsize` jobs are held. Jobs are
+    spread over `shards` partitions by id, each with its own lock, so progress
+    updates from concurrent jobs don't serialize on a single lock.
+    """
+
+    def __init__(self, maxsize=500, ttl=3600, shards=16):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        per_shard = -(-maxsize // shards)
+        self._shards = [_JobShard(per_shard, ttl) for _ in range(shards)]
+
+    def _shard(self, job_id):
+        return self._shards[hash(job_id) % len(self._shards)]
+
+    def create(self, job_id, progress='Starting...'):
+        """Register a new running job."""
+        self._shard(job_id).create(job_id, {'status': 'running', 'progress': progress})
+
+    def set_progress(self, job_id, progress):
+        self._shard(job_id).update(job_id, progress=progress)
+
+    def set_result(self, job_id, result):
+        self._shard(job_id).update(job_id, status='done', result=encode_result(result))
+
+    def set_error(self, job_id, error):
+        self._shard(job_id).update(job_id, status='error', error=error)
+
+    def set_pdf(self, job_id, pdf):
+        self._shard(job_id).update(job_id, pdf=pdf)
+
+    def get_pdf(self, job_id):
+        """Return the rendered report PDF for a job, if one has been stored."""
+        return self._shard(job_id).get(job_id, 'pdf')
+
+    def get(self, job_id):
+        """Return a copy of the job record, or None if unknown or expired."""
+        job = self._shard(job_id).get(job_id)
+        if not job:
+            return None
+        
+        job.pop('pdf', None)
+        if 'result' in job:
+            job['result'] = decode_result(job['result'])
+        return job
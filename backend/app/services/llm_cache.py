@@ -0,0 +1,137 @@
+"""Two-tier cache of LLM responses: an in-process LRU in front of SQLite."""
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# On-disk tier location, by default in the user's cache directory rather than
+# wherever the server was started; set LLM_CACHE_PATH to '' to keep the cache
+# in memory only.
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', os.path.join(
+    os.getenv('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')),
+    'codex', 'llm_cache.sqlite'
+))
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+
+
+class ResponseCache:
+    """Exact-match key -> text cache shared by every LLM client in the process.
+
+    Lookups hit the in-memory LRU first and fall back to an SQLite table, so
+    responses survive restarts and are shared between worker processes.
+    Entries older than `ttl` seconds are ignored and pruned. If the database
+    can't be opened the cache quietly degrades to memory only.
+
+    `get`/`put` may block on disk and on the database lock; coroutines use the
+    `a*` variants, which run them in a worker thread.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, maxsize=128, ttl=LLM_CACHE_TTL):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_failed = not path
+
+    def _connect(self):
+        """Open the database on first use. Caller must hold the lock."""
+        if self._db is None and not self._db_failed:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                db = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+                db.execute('PRAGMA journal_mode=WAL')
+                db.execute('CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, response TEXT, ts INTEGER)')
+                db.execute('DELETE FROM llm_cache WHERE ts < ?', (int(time.time()) - self.ttl,))
+                self._db = db
+            except (sqlite3.Error, OSError) as e:
+                logger.warning("LLM cache database unavailable, using memory only: %s", e)
+                self._db_failed = True
+        return self._db
+
+    def _remember(self, key, value):
+        """Insert into the in-memory tier. Caller must hold the lock."""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached text for `key`, or None."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                return value
+            db = self._connect()
+            if db is None:
+                return None
+            try:
+                row = db.execute(
+                    'SELECT response FROM llm_cache WHERE key = ? AND ts >= ?',
+                    (key, int(time.time()) - self.ttl)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("LLM cache read failed: %s", e)
+                return None
+            if row is None:
+                return None
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            db = self._connect()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    'INSERT OR REPLACE INTO llm_cache (key, response, ts) VALUES (?, ?, ?)',
+                    (key, value, int(time.time()))
+                )
+            except sqlite3.Error as e:
+                logger.warning("LLM cache write failed: %s", e)
+
+    def put_many(self, items):
+        """Store several (key, text) pairs in one transaction."""
+        items = list(items)
+        if not items:
+            return
+        now = int(time.time())
+        with self._lock:
+            for key, value in items:
+                self._remember(key, value)
+            db = self._connect()
+            if db is None:
+                return
+            try:
+                with db:
+                    db.execute('BEGIN')
+                    db.executemany(
+                        'INSERT OR REPLACE INTO llm_cache (key, response, ts) VALUES (?, ?, ?)',
+                        [(key, value, now) for key, value in items]
+                    )
+            except sqlite3.Error as e:
+                logger.warning("LLM cache write failed: %s", e)
+
+    async def aget(self, key):
+        return await asyncio.to_thread(self.get, key)
+
+    async def aget_many(self, keys):
+        """Cached texts (or None) for each of `keys`, looked up in one worker thread."""
+        return await asyncio.to_thread(lambda: [self.get(key) for key in keys])
+
+    async def aput(self, key, value):
+        await asyncio.to_thread(self.put, key, value)
+
+    async def aput_many(self, items):
+        await asyncio.to_thread(self.put_many, items)
@@ -7,58 +7,443 @@ Requirements:
 Authentication:
   Set GEMINI_API_KEY in env or pass into GeminiLLMReal(api_key=...)
 """
-import os, json, textwrap, re, time, random
+import os, io, textwrap, re, time, random, hashlib, logging, asyncio, functools
+from collections import defaultdict
+from bisect import bisect_right
+from itertools import accumulate, chain, repeat
+import orjson
 from dotenv import load_dotenv
 from app.services.enhancement import CodeEnhancementAnalyzer
+from app.services.llm_cache import ResponseCache
 load_dotenv()
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
+logger = logging.getLogger(__name__)
+
+# Exact-match cache of model responses (and of parsed per-file issues), keyed
+# by a blake2b digest of the model, prompt version, prompt kind and file
+# contents. Shared across instances and, through SQLite, across restarts, so
+# re-analysing an unchanged repo skips both prompt building and the API.
+RESPONSE_CACHE_SIZE = 128
+RESPONSE_CACHE = ResponseCache(maxsize=RESPONSE_CACHE_SIZE)
+
+# Issue detection is split into chunks of at most MAX_CHUNK_FILES files and
+# roughly MAX_CHUNK_TOKENS prompt tokens (estimated at ~4 chars per token),
+# and at most LLM_CONCURRENCY chunks are in flight per analysis. Small chunks
+# fan out in parallel and keep each request well clear of timeouts.
+MAX_CHUNK_FILES = 4
+MAX_CHUNK_TOKENS = 100_000
+CHARS_PER_TOKEN = 4
+LLM_CONCURRENCY = 8
+ISSUE_PROMPT_FILE_CHARS = 15000
+
+# Files of at least PROMPT_SKIP_MIN_CHARS whose lines average over
+# PROMPT_SKIP_LINE_CHARS (minified bundles, generated dumps), or that carry NUL
+# bytes, are kept out of prompts: they'd take most of the token budget while
+# their truncated head tells the model almost nothing.
+PROMPT_SKIP_MIN_CHARS = 50000
+PROMPT_SKIP_LINE_CHARS = 500
+
+# Rate-limited (429), 5xx and connection failures are retried up to
+# MAX_ATTEMPTS times in all, with decorrelated-jitter backoff between
+# RETRY_BASE_DELAY and RETRY_MAX_DELAY seconds. A server-provided wait
+# (Retry-After, or the API's RetryInfo) is honoured up to RETRY_AFTER_MAX.
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 1
+RETRY_MAX_DELAY = 30
+RETRY_AFTER_MAX = 60
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# The patch prompt carries every file; each is capped at PATCH_PROMPT_FILE_CHARS
+# and together they share one budget of PATCH_PROMPT_MAX_CHARS.
+PATCH_PROMPT_FILE_CHARS = 20000
+PATCH_PROMPT_MAX_CHARS = MAX_CHUNK_TOKENS * CHARS_PER_TOKEN
+
+# Needles for the offline heuristic scan -> (title, description, severity, type),
+# reported in this order per file. All are matched together in one pass.
+HEURISTIC_RULES = {
+    'eval(': ('Use of eval() detected', 'Found eval() in {path}', 'high', 'vuln'),
+    'TODO': ('TODO found', 'TODO in {path}', 'low', 'style'),
+}
+HEURISTIC_MARKERS = re.compile('|'.join(map(re.escape, HEURISTIC_RULES)))
+
+# Static prompt headers, dedented once at import.
+ISSUE_DETECTION_HEADER = textwrap.dedent("""
+            You are a Senior Principal Software Engineer and Security Researcher.
+            Analyze the provided code files deeply for:
+            1. Critical Security Vulnerabilities (OWASP Top 10, Injection, Auth flaws)
+            2. Major Bugs & Logic Errors
+            3. severe Performance Bottlenecks
+            4. Architectural Flaws
+
+            Output MUST be a valid JSON array of objects.
+            Schema:
+            [
+              {
+                "title": "Short title of the issue",
+                "description": "Detailed technical explanation",
+                "severity": "high" | "medium" | "low",
+                "file": "file_path",
+                "line": line_number,
+                "type": "bug" | "vuln" | "perf" | "arch",
+                "suggested_fix": "Description of how to fix it"
+              }
+            ]
+
+            Do not output markdown code blocks. Just the raw JSON string.
+            If no issues are found, return [].
+""")
+
+# Same analysis as ISSUE_DETECTION_HEADER, but for files from several
+# independent requests packed into one prompt; see detect_issues_batch.
+BATCH_ISSUE_DETECTION_HEADER = textwrap.dedent("""
+            You are a Senior Principal Software Engineer and Security Researcher.
+            Analyze each of the provided code files deeply for:
+            1. Critical Security Vulnerabilities (OWASP Top 10, Injection, Auth flaws)
+            2. Major Bugs & Logic Errors
+            3. severe Performance Bottlenecks
+            4. Architectural Flaws
+
+            Output MUST be a valid JSON object mapping every file path, exactly as
+            given after "File:", to an array of issue objects for that file.
+            Schema:
+            {
+              "file_path": [
+                {
+                  "title": "Short title of the issue",
+                  "description": "Detailed technical explanation",
+                  "severity": "high" | "medium" | "low",
+                  "line": line_number,
+                  "type": "bug" | "vuln" | "perf" | "arch",
+                  "suggested_fix": "Description of how to fix it"
+                }
+              ]
+            }
+
+            Do not output markdown code blocks. Just the raw JSON string.
+            Map files without issues to [].
+""")
+
+PATCH_HEADER = textwrap.dedent("""
+            You are a DevOps Engineer and Code Expert.
+            Your task is to generate executable UNIFIED DIFF patches to fix the identified issues.
+            
+            Rules:
+            1. Return ONLY the unified diffs. No explanations, no markdown.
+            2. Each file patch must start with `diff --git a/path b/path` standard format or `--- a/path` and `+++ b/path`.
+            3. Ensure context lines match exactly so the patch applies cleanly.
+            4. Fix ALL high severity issues provided.
+
+            Output format:
+            --- a/path/to/file.py
+            +++ b/path/to/file.py
+            @@ -10,4 +10,4 @@
+             original line
+            -broken line
+            +fixed line
+             context line
+""")
+
+# Changes whenever the prompt text or truncation limits do, so cached
+# responses to an older prompt are never served for the current one.
+PROMPT_VERSION = hashlib.blake2b(
+    "\0".join((ISSUE_DETECTION_HEADER, BATCH_ISSUE_DETECTION_HEADER, PATCH_HEADER,
+               str(ISSUE_PROMPT_FILE_CHARS), str(PATCH_PROMPT_FILE_CHARS), str(PATCH_PROMPT_MAX_CHARS))).encode(),
+    digest_size=16
+).hexdigest()
+
+def _fair_share(sizes, cap, total):
+    """Split `total` chars across files of the given sizes, each capped at `cap`.
+    
+    Max-min fair: small files keep all of their content and whatever is left
+    is divided evenly among the larger ones, so one huge file cannot crowd
+    the rest out of the prompt.
+    """
+    wanted = [min(size, cap) for size in sizes]
+    if sum(wanted) <= total:
+        return wanted
+    alloc = [0] * len(wanted)
+    remaining = total
+    order = sorted(range(len(wanted)), key=wanted.__getitem__)
+    for n, i in enumerate(order):
+        alloc[i] = min(wanted[i], remaining // (len(order) - n))
+        remaining -= alloc[i]
+    return alloc
+
+def _backoff_delays():
+    """Decorrelated-jitter backoff: the wait before each retry of one call."""
+    delay = RETRY_BASE_DELAY
+    for _ in range(MAX_ATTEMPTS - 1):
+        delay = min(RETRY_MAX_DELAY, random.uniform(RETRY_BASE_DELAY, delay * 3))
+        yield delay
+
+def _status_code(exc):
+    # google.genai.errors.APIError carries `code`; HTTP-level errors a `response`.
+    code = getattr(exc, 'code', None)
+    if code is None:
+        code = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return code if isinstance(code, int) else None
+
+def _retry_after(exc):
+    """Server-requested wait in seconds, from Retry-After or RetryInfo, if any."""
+    headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    value = headers.get('Retry-After') if headers is not None else None
+    if value is None:
+        details = getattr(exc, 'details', None)
+        error = details.get('error', details) if isinstance(details, dict) else {}
+        for detail in (error.get('details') or []) if isinstance(error, dict) else []:
+            if isinstance(detail, dict) and detail.get('retryDelay'):
+                value = str(detail['retryDelay']).rstrip('s')
+                break
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+# Base classes of the network errors google-genai's HTTP clients raise
+# (httpx.TransportError covers ConnectError, ReadTimeout, ...; aiohttp for the
+# aio client when it's installed). Matched by name so neither is imported here.
+TRANSPORT_ERROR_NAMES = frozenset({'TransportError', 'ClientConnectionError'})
+
+def _is_transport_error(exc):
+    """Connection and timeout failures, which carry no status code."""
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in TRANSPORT_ERROR_NAMES for cls in type(exc).__mro__)
+
+def _next_retry_delay(exc, delays):
+    """Seconds to wait before retrying after `exc`, or None to give up."""
+    code = _status_code(exc)
+    transient = code in RETRYABLE_STATUS if code is not None else (
+        "429" in str(exc) or _is_transport_error(exc)
+    )
+    delay = next(delays, None) if transient else None
+    if delay is None:
+        return None
+    server_delay = _retry_after(exc)
+    if server_delay is None:
+        return delay
+    return server_delay if server_delay <= RETRY_AFTER_MAX else None
+
+def _is_prompt_worthy(content):
+    """False for contents that look generated or binary rather than source."""
+    if '\0' in content:
+        return False
+    return len(content) < PROMPT_SKIP_MIN_CHARS or content.count('\n') * PROMPT_SKIP_LINE_CHARS >= len(content)
+
+def _prompt_files(files):
+    """The files that are worth sending to the model; see _is_prompt_worthy."""
+    kept = [f for f in files if _is_prompt_worthy(f['content'])]
+    if len(kept) < len(files):
+        logger.info("Leaving %d generated or binary file(s) out of the prompt", len(files) - len(kept))
+    return kept
+
+@functools.lru_cache(maxsize=32)
+def _get_client(api_key):
+    """Return a shared genai client per API key, or None if the SDK is unusable.
+    
+    Reusing the client keeps its HTTP connection pool warm across jobs.
+    """
+    try:
+        from google import genai
+        return genai.Client(api_key=api_key)
+    except Exception:
+        return None
+
 class GeminiLLMReal:
     def __init__(self, api_key: str = None, model: str = 'gemini-2.5-flash'):
         self.api_key = api_key or GEMINI_API_KEY
         self.model = model
-        self.client = None
         self.enhancement_analyzer = CodeEnhancementAnalyzer()
-        try:
-            from google import genai
-            self.client = genai.Client(api_key=self.api_key)
-        except Exception as e:
-            self.client = None
+        self.client = _get_client(self.api_key)
     
     def detect_issues(self, files):
         """Detect bugs, vulnerabilities, and issues."""
-        prompt = self._build_issue_detection_prompt(files)
-        # Use SDK if available
-        if self.client:
-            max_retries = 3
-            base_delay = 2
-            for attempt in range(max_retries):
-                try:
-                    resp = self.client.models.generate_content(model=self.model, contents=prompt)
-                    text = resp.text
-                    break
-                except Exception as e:
-                    if "429" in str(e) and attempt < max_retries - 1:
-                        time.sleep(base_delay * (2 ** attempt) + random.uniform(0, 1))
-                        continue
-                    return self._heuristic_detect(files)
-            else:
-                return self._heuristic_detect(files)
-        else:
+        if not self.client:
             # Fallback: return heuristic detections
             return self._heuristic_detect(files)
+        files = _prompt_files(files)
+        if not files:
+            return self._heuristic_detect(files)
+        text = self._generate_cached(
+            self._content_key('issues', files),
+            lambda: self._build_issue_detection_prompt(files)
+        )
+        return self._issues_from_reply(text, files)
+    
+    async def _adetect_chunk(self, files):
+        """Model-reported issues for one chunk via the aio client, or None if unusable."""
+        text = await self._agenerate_cached(
+            self._content_key('issues', files),
+            lambda: self._build_issue_detection_prompt(files)
+        )
+        return self._parse_issues(text)
+    
+    def _issues_from_reply(self, text, files):
+        issues = self._parse_issues(text)
+        # If LLM returned plain text (or the call failed), return heuristic
+        return self._heuristic_detect(files) if issues is None else issues
+    
+    def _parse_issues(self, text):
         # Parse JSON from LLM output
         try:
-            # Extract JSON if wrapped in markdown code blocks
-            if '```json' in text:
-                text = text.split('```json')[1].split('```')[0]
-            elif '```' in text:
-                text = text.split('```')[1].split('```')[0]
-            issues = json.loads(text.strip())
-            return issues if isinstance(issues, list) else [issues]
+            issues = self._parse_json_reply(text)
         except Exception:
-            # If LLM returned plain text, return heuristic
+            return None
+        return issues if isinstance(issues, list) else [issues]
+    
+    def detect_issues_batch(self, file_lists):
+        """Detect issues for several independent file lists, sharing requests.
+        
+        Files from every list are packed together into prompt-sized chunks and
+        each chunk asks for a reply keyed by file path, so many small analyses
+        cost a few round-trips instead of one or more each. Paths are tagged
+        with their list index so identical paths from different lists don't
+        collide. Returns one issue list per input list, in order.
+        """
+        results = [[] for _ in file_lists]
+        tagged = [
+            {'path': f"{i}:{f['path']}", 'content': f['content']}
+            for i, files in enumerate(file_lists) for f in _prompt_files(files)
+        ]
+        # Pack by token budget alone; the point here is fewer round-trips
+        for chunk in self._chunk_files(tagged, max_files=None, header=BATCH_ISSUE_DETECTION_HEADER):
+            for tagged_path, issues in self._detect_batch_chunk(chunk).items():
+                tag, _, path = str(tagged_path).partition(':')
+                if not tag.isdigit() or int(tag) >= len(results):
+                    continue
+                results[int(tag)].extend({**issue, 'file': path} for issue in issues if isinstance(issue, dict))
+        return [issues or self._heuristic_detect([]) for issues in results]
+    
+    def _detect_batch_chunk(self, chunk):
+        """Return {tagged path: [issues]} for one packed chunk of files."""
+        if self.client:
+            text = self._generate_cached(
+                self._content_key('issues-batch', chunk),
+                lambda: self._build_issue_detection_prompt(chunk, BATCH_ISSUE_DETECTION_HEADER)
+            )
+            try:
+                reply = self._parse_json_reply(text)
+            except Exception:
+                reply = None
+            if isinstance(reply, dict):
+                return {path: issues for path, issues in reply.items() if isinstance(issues, list)}
+            if isinstance(reply, list):
+                return self._group_by_file(reply)
+        # Heuristic fallback, run on the untagged paths so descriptions read right
+        return {
+            f['path']: [
+                issue for issue in self._heuristic_detect([{**f, 'path': f['path'].partition(':')[2]}])
+                if issue['type'] != 'info'
+            ]
+            for f in chunk
+        }
+    
+    @staticmethod
+    def _group_by_file(issues):
+        by_file = defaultdict(list)
+        for issue in issues:
+            if isinstance(issue, dict):
+                by_file[issue.get('file', '')].append(issue)
+        return by_file
+    
+    @staticmethod
+    def _parse_json_reply(text):
+        """Parse a JSON reply, unwrapping it from markdown code fences if present."""
+        # Extract JSON if wrapped in markdown code blocks
+        if '```json' in text:
+            text = text.split('```json')[1].split('```')[0]
+        elif '```' in text:
+            text = text.split('```')[1].split('```')[0]
+        return orjson.loads(text.strip())
+    
+    async def adetect_issues(self, files):
+        """Detect issues chunk by chunk, running up to LLM_CONCURRENCY calls at once.
+        
+        Issues the model reported for a file are also cached per file, so
+        after an edit only changed files are sent again, repacked into fresh
+        chunks. Every chunk prompt starts with the same static header, so
+        chunks after the first also benefit from Gemini's implicit prefix
+        caching.
+        """
+        if not self.client or not files:
+            # Fallback: return heuristic detections
+            return self._heuristic_detect(files)
+        files = _prompt_files(files)
+        if not files:
             return self._heuristic_detect(files)
+        
+        results, pending = [], []
+        cached_issues = await RESPONSE_CACHE.aget_many([self._file_issues_key(f) for f in files])
+        for f, cached in zip(files, cached_issues):
+            if cached is None:
+                pending.append(f)
+            else:
+                results.append(orjson.loads(cached))
+        if pending:
+            logger.info("Issue detection: %d of %d files cached", len(files) - len(pending), len(files))
+        
+        semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+        
+        async def detect_chunk(chunk):
+            async with semaphore:
+                issues = await self._adetect_chunk(chunk)
+            if issues is None:
+                return self._heuristic_detect(chunk)
+            await RESPONSE_CACHE.aput_many(self._file_issue_entries(chunk, issues))
+            return issues
+        
+        results.extend(await asyncio.gather(*(detect_chunk(chunk) for chunk in self._chunk_files(pending))))
+        # Nothing found anywhere (e.g. every file a cached clean result): report
+        # the usual "no issues" placeholder, as detect_issues_batch does.
+        return self._merge_issues(results) or self._heuristic_detect([])
+    
+    def _file_issues_key(self, f):
+        return self._content_key('file-issues', [f])
+    
+    def _file_issue_entries(self, chunk, issues):
+        """Per-file cache entries for a chunk's issues; none if some can't be attributed to a file."""
+        by_file = self._group_by_file(issues)
+        paths = {f['path'] for f in chunk}
+        if len(issues) != sum(map(len, by_file.values())) or not by_file.keys() <= paths:
+            return []
+        return [(self._file_issues_key(f), orjson.dumps(by_file.get(f['path'], [])).decode()) for f in chunk]
+    
+    def _chunk_files(self, files, max_files=MAX_CHUNK_FILES, header=ISSUE_DETECTION_HEADER):
+        """Partition files into chunks of up to `max_files` files and the token budget left by `header`."""
+        budget = MAX_CHUNK_TOKENS * CHARS_PER_TOKEN - len(header)
+        chunks = []
+        current, current_size = [], 0
+        for f in files:
+            size = len(f['path']) + min(len(f['content']), ISSUE_PROMPT_FILE_CHARS) + 20
+            if current and (current_size + size > budget or len(current) == max_files):
+                chunks.append(current)
+                current, current_size = [], 0
+            current.append(f)
+            current_size += size
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    def _merge_issues(self, results):
+        """Flatten per-chunk issue lists, dropping duplicates by (file, line, title)."""
+        merged = []
+        seen = set()
+        for issues in results:
+            for issue in issues:
+                if isinstance(issue, dict):
+                    key = (issue.get('file'), issue.get('line'), issue.get('title'))
+                else:
+                    key = repr(issue)
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append(issue)
+        
+        # Chunks without findings contribute the heuristic "no issues" placeholder;
+        # only keep it if no chunk found anything.
+        real = [i for i in merged if not (isinstance(i, dict) and i.get('type') == 'info')]
+        return real or merged
     
     def detect_enhancements(self, files):
         """Detect code enhancement opportunities."""
@@ -75,27 +460,143 @@ class GeminiLLMReal:
             'enhancements': enhancements,
             'file_suggestions': file_suggestions
         }
+    
+    async def analyze_comprehensive_async(self, files):
+        """Async variant of `analyze_comprehensive` with chunked issue detection."""
+        # Gemini I/O and the CPU-bound enhancement scan overlap
+        issues, enhancements = await asyncio.gather(
+            self.adetect_issues(files),
+            asyncio.to_thread(self.detect_enhancements, files)
+        )
+        file_suggestions = self._suggest_files_to_update(files, issues, enhancements)
+        
+        return {
+            'issues': issues,
+            'enhancements': enhancements,
+            'file_suggestions': file_suggestions
+        }
 
     def generate_patch(self, files, issues):
-        prompt = self._build_patch_prompt(files, issues)
         if self.client:
-            max_retries = 3
-            base_delay = 2
-            for attempt in range(max_retries):
-                try:
-                    resp = self.client.models.generate_content(model=self.model, contents=prompt)
-                    patch_text = resp.text
-                    return patch_text
-                except Exception as e:
-                    if "429" in str(e) and attempt < max_retries - 1:
-                        time.sleep(base_delay * (2 ** attempt) + random.uniform(0, 1))
-                        continue
-                    return self._generate_fallback_patch(issues, files)
-            else:
-                return self._generate_fallback_patch(issues, files)
-        else:
-            # Fallback simple patch
-            return self._generate_fallback_patch(issues, files)
+            prompt_files = _prompt_files(files)
+            patch_text = self._generate_cached(
+                self._content_key('patch', prompt_files, orjson.dumps(issues, default=str, option=orjson.OPT_SORT_KEYS).decode()),
+                lambda: self._build_patch_prompt(prompt_files, issues)
+            )
+            if patch_text is not None:
+                return patch_text
+        # Fallback simple patch
+        return self._generate_fallback_patch(issues, files)
+
+    async def agenerate_patch(self, files, issues):
+        """Async variant of `generate_patch`."""
+        if self.client:
+            prompt_files = _prompt_files(files)
+            patch_text = await self._agenerate_cached(
+                self._content_key('patch', prompt_files, orjson.dumps(issues, default=str, option=orjson.OPT_SORT_KEYS).decode()),
+                lambda: self._build_patch_prompt(prompt_files, issues)
+            )
+            if patch_text is not None:
+                return patch_text
+        # Fallback simple patch
+        return self._generate_fallback_patch(issues, files)
+
+    def _generate_cached(self, key, build_prompt):
+        """Return the response text for `key`, calling Gemini on a cache miss.
+        
+        The prompt is only built (via `build_prompt()`) on a miss. Returns None
+        if the call fails and `_call_with_retry` gives up.
+        """
+        text = self._cache_get(key)
+        if text is not None:
+            return text
+        prompt = build_prompt()
+        return self._call_with_retry(
+            lambda: self._record_response(self.client.models.generate_content(model=self.model, contents=prompt), key)
+        )
+
+    async def _agenerate_cached(self, key, build_prompt):
+        """Async `_generate_cached`: awaits the aio client and sleeps without blocking the loop."""
+        text = self._log_hit(await RESPONSE_CACHE.aget(key))
+        if text is not None:
+            return text
+        prompt = build_prompt()
+        
+        async def call():
+            text = self._response_text(await self.client.aio.models.generate_content(model=self.model, contents=prompt))
+            if text:
+                await RESPONSE_CACHE.aput(key, text)
+            return text
+        
+        return await self._acall_with_retry(call)
+
+    def _call_with_retry(self, call):
+        """Return `call()`, retrying transient failures; None once it gives up."""
+        delays = _backoff_delays()
+        while True:
+            try:
+                return call()
+            except Exception as e:
+                delay = _next_retry_delay(e, delays)
+                if delay is None:
+                    logger.warning("Gemini call failed: %s", e)
+                    return None
+                time.sleep(delay)
+
+    async def _acall_with_retry(self, call):
+        """Async `_call_with_retry` for a coroutine function."""
+        delays = _backoff_delays()
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                delay = _next_retry_delay(e, delays)
+                if delay is None:
+                    logger.warning("Gemini call failed: %s", e)
+                    return None
+                await asyncio.sleep(delay)
+
+    def _content_key(self, kind, files, extra=''):
+        """Content address of a request: model, prompt version and kind, file paths/contents, extra.
+        
+        Computed from the inputs rather than the rendered prompt, so a cache hit
+        skips building the prompt as well as the API call. Every field is
+        length-prefixed to keep the encoding unambiguous.
+        """
+        h = hashlib.blake2b(digest_size=32)
+        for part in chain((self.model, PROMPT_VERSION, kind, extra), *((f['path'], f['content']) for f in files)):
+            data = part.encode('utf-8', 'surrogatepass')
+            h.update(len(data).to_bytes(8, 'little'))
+            h.update(data)
+        return h.hexdigest()
+
+    def _cache_get(self, key):
+        return self._log_hit(RESPONSE_CACHE.get(key))
+
+    @staticmethod
+    def _log_hit(text):
+        if text is not None:
+            logger.info("Gemini response cache hit")
+        return text
+
+    def _record_response(self, resp, key):
+        """Log token usage and remember the response text under `key`."""
+        text = self._response_text(resp)
+        if text:
+            RESPONSE_CACHE.put(key, text)
+        return text
+
+    @staticmethod
+    def _response_text(resp):
+        """Log a response's token usage and return its text."""
+        usage = getattr(resp, 'usage_metadata', None)
+        if usage is not None:
+            logger.info(
+                "Gemini usage: prompt=%s cached=%s",
+                getattr(usage, 'prompt_token_count', None),
+                getattr(usage, 'cached_content_token_count', None)
+            )
+        return resp.text
 
     def _generate_fallback_patch(self, issues, files):
         chunks = []
@@ -106,134 +607,116 @@ class GeminiLLMReal:
         return '\n'.join(chunks) if chunks else "# No patches generated"
 
     def _heuristic_detect(self, files):
+        """Flag eval() and TODO in each file, scanning all files in one pass.
+        
+        Contents are joined with a NUL sentinel (which no needle contains) and
+        searched once; match offsets map back to their file through the
+        sorted array of file end offsets. Only each needle's first hit per
+        file is needed, so once a file has all of them the search jumps past it.
+        """
         issues = []
-        for f in files:
-            c = f['content']
-            if 'eval(' in c:
-                issues.append({'title':'Use of eval() detected','description':f"Found eval() in {f['path']}",'severity':'high','file':f['path'],'line':self._find_line(c,'eval('),'type':'vuln'})
-            if 'TODO' in c:
-                issues.append({'title':'TODO found','description':f"TODO in {f['path']}",'severity':'low','file':f['path'],'line':self._find_line(c,'TODO'),'type':'style'})
+        contents = [f['content'] for f in files]
+        ends = list(accumulate(len(c) + 1 for c in contents))
+        big = '\0'.join(contents)
+        first = defaultdict(dict)
+        pos = 0
+        while (m := HEURISTIC_MARKERS.search(big, pos)):
+            i = bisect_right(ends, m.start())
+            seen = first[i]
+            seen.setdefault(m.group(), m.start())
+            pos = ends[i] if len(seen) == len(HEURISTIC_RULES) else m.end()
+        
+        for i, seen in sorted(first.items()):
+            path = files[i]['path']
+            start = ends[i - 1] if i else 0
+            for needle, (title, description, severity, kind) in HEURISTIC_RULES.items():
+                if needle in seen:
+                    issues.append({'title':title,'description':description.format(path=path),'severity':severity,'file':path,'line':big.count('\n', start, seen[needle]) + 1,'type':kind})
         if not issues:
             issues.append({'title':'No issues detected','description':'No obvious issues found','severity':'low','file':'','line':0,'type':'info'})
         return issues
 
-    def _find_line(self, content, needle):
-        for idx, line in enumerate(content.splitlines(), start=1):
-            if needle in line:
-                return idx
-        return 0
-
     def _suggest_files_to_update(self, files, issues, enhancements):
         """Suggest which files need updates based on analysis."""
-        file_suggestions = {}
+        # Priority is settled as entries are tallied: any issue makes a file
+        # 'high', more than three enhancements alone make it 'medium'.
+        file_suggestions = defaultdict(lambda: {
+            'file': '',
+            'issues_count': 0,
+            'enhancements_count': 0,
+            'priority': 'low',
+            'suggested_changes': []
+        })
         
         # Add files with issues
         for issue in issues:
-            if issue.get('file'):
-                if issue['file'] not in file_suggestions:
-                    file_suggestions[issue['file']] = {
-                        'file': issue['file'],
-                        'issues_count': 0,
-                        'enhancements_count': 0,
-                        'priority': 'medium',
-                        'suggested_changes': []
-                    }
-                file_suggestions[issue['file']]['issues_count'] += 1
-                file_suggestions[issue['file']]['suggested_changes'].append({
-                    'type': 'fix',
-                    'title': issue.get('title', ''),
-                    'line': issue.get('line', 0)
-                })
+            path = issue.get('file')
+            if not path:
+                continue
+            d = file_suggestions[path]
+            d['file'] = path
+            d['issues_count'] += 1
+            d['priority'] = 'high'
+            d['suggested_changes'].append({
+                'type': 'fix',
+                'title': issue.get('title', ''),
+                'line': issue.get('line', 0)
+            })
         
         # Add files with enhancements
         for enhancement in enhancements:
-            if enhancement.get('file'):
-                if enhancement['file'] not in file_suggestions:
-                    file_suggestions[enhancement['file']] = {
-                        'file': enhancement['file'],
-                        'issues_count': 0,
-                        'enhancements_count': 0,
-                        'priority': 'low',
-                        'suggested_changes': []
-                    }
-                file_suggestions[enhancement['file']]['enhancements_count'] += 1
-                file_suggestions[enhancement['file']]['suggested_changes'].append({
-                    'type': 'enhancement',
-                    'title': enhancement.get('title', ''),
-                    'line': enhancement.get('line', 0)
-                })
-        
-        # Set priority based on issues count
-        for file_key in file_suggestions:
-            if file_suggestions[file_key]['issues_count'] > 0:
-                file_suggestions[file_key]['priority'] = 'high'
-            elif file_suggestions[file_key]['enhancements_count'] > 3:
-                file_suggestions[file_key]['priority'] = 'medium'
+            path = enhancement.get('file')
+            if not path:
+                continue
+            d = file_suggestions[path]
+            d['file'] = path
+            d['enhancements_count'] += 1
+            # Issues are tallied first, so 'high' is already final here
+            if d['enhancements_count'] > 3 and d['priority'] != 'high':
+                d['priority'] = 'medium'
+            d['suggested_changes'].append({
+                'type': 'enhancement',
+                'title': enhancement.get('title', ''),
+                'line': enhancement.get('line', 0)
+            })
         
         return list(file_suggestions.values())
 
-    def _build_issue_detection_prompt(self, files):
-        header = textwrap.dedent("""
-            You are a Senior Principal Software Engineer and Security Researcher.
-            Analyze the provided code files deeply for:
-            1. Critical Security Vulnerabilities (OWASP Top 10, Injection, Auth flaws)
-            2. Major Bugs & Logic Errors
-            3. severe Performance Bottlenecks
-            4. Architectural Flaws
-
-            Output MUST be a valid JSON array of objects.
-            Schema:
-            [
-              {
-                "title": "Short title of the issue",
-                "description": "Detailed technical explanation",
-                "severity": "high" | "medium" | "low",
-                "file": "file_path",
-                "line": line_number,
-                "type": "bug" | "vuln" | "perf" | "arch",
-                "suggested_fix": "Description of how to fix it"
-              }
-            ]
-
-            Do not output markdown code blocks. Just the raw JSON string.
-            If no issues are found, return [].
-        """)
-        parts = []
-        for f in files:
-            # Increased limit for better context
-            safe_content = f['content'][:15000]
-            parts.append(f"File: {f['path']}\nContent:\n{safe_content}\n")
+    @staticmethod
+    def _write_files(buf, files, limits):
+        """Write each file's path and its first `limit` chars of content to `buf`.
         
-        return header + "\n\n" + "\n".join(parts)
+        Pieces go straight into the buffer, so no per-file string holding a
+        full copy of the content is built on the way to the prompt.
+        """
+        write = buf.write
+        for i, (f, limit) in enumerate(zip(files, limits)):
+            if i:
+                write("\n")
+            write("File: ")
+            write(f['path'])
+            write("\nContent:\n")
+            write(f['content'][:limit])
+            write("\n")
 
-    def _build_patch_prompt(self, files, issues):
-        header = textwrap.dedent("""
-            You are a DevOps Engineer and Code Expert.
-            Your task is to generate executable UNIFIED DIFF patches to fix the identified issues.
-            
-            Rules:
-            1. Return ONLY the unified diffs. No explanations, no markdown.
-            2. Each file patch must start with `diff --git a/path b/path` standard format or `--- a/path` and `+++ b/path`.
-            3. Ensure context lines match exactly so the patch applies cleanly.
-            4. Fix ALL high severity issues provided.
+    def _build_issue_detection_prompt(self, files, header=ISSUE_DETECTION_HEADER):
+        buf = io.StringIO()
+        buf.write(header)
+        buf.write("\n\n")
+        # Increased limit for better context
+        self._write_files(buf, files, repeat(ISSUE_PROMPT_FILE_CHARS))
+        return buf.getvalue()
 
-            Issues to fix:
-            """ + json.dumps(issues, indent=2) + """
-            
-            Output format:
-            --- a/path/to/file.py
-            +++ b/path/to/file.py
-            @@ -10,4 +10,4 @@
-             original line
-            -broken line
-            +fixed line
-             context line
-        """)
-        
-        parts = []
-        for f in files:
-            # Provide full content for accurate patching
-            safe_content = f['content'][:20000]
-            parts.append(f"File: {f['path']}\nContent:\n{safe_content}\n")
-        
-        return header + "\n\n" + "\n".join(parts)
+    def _build_patch_prompt(self, files, issues):
+        # Static instructions come first and the per-request data last, so the
+        # prompt prefix stays stable across calls for Gemini's implicit caching.
+        buf = io.StringIO()
+        buf.write(PATCH_HEADER)
+        buf.write("\n\n")
+        # Provide as much content as the budget allows for accurate patching
+        budgets = _fair_share([len(f['content']) for f in files], PATCH_PROMPT_FILE_CHARS, PATCH_PROMPT_MAX_CHARS)
+        self._write_files(buf, files, budgets)
+        # Compact, not indented: the model reads it just as well for fewer tokens
+        buf.write("\n\nIssues to fix:\n")
+        buf.write(orjson.dumps(issues, default=str).decode())
+        return buf.getvalue()
@@ -2,6 +2,9 @@
 import zipfile
 import io
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 
 class RepoScanner:
     """Scan repository files and extract content."""
@@ -18,66 +21,108 @@ class RepoScanner:
         'venv', 'env', '.venv', 'target', 'bin', 'obj', '.idea', '.vscode'
     ]
     
-    def extract_and_scan(self, zip_content: bytes) -> list:
-        """Extract ZIP and scan all supported files."""
-        files = []
+    # Set views of the lists above for O(1) membership tests per entry
+    _SUPPORTED_SET = frozenset(SUPPORTED_EXTENSIONS)
+    _IGNORE_SET = frozenset(IGNORE_DIRS)
+    
+    LANGUAGE_EXTENSIONS = {
+        'python': frozenset({'.py'}),
+        'javascript': frozenset({'.js', '.jsx'}),
+        'typescript': frozenset({'.ts', '.tsx'}),
+        'java': frozenset({'.java'}),
+        'go': frozenset({'.go'}),
+        'ruby': frozenset({'.rb'}),
+        'php': frozenset({'.php'}),
+        'csharp': frozenset({'.cs'}),
+        'cpp': frozenset({'.cpp', '.c', '.h'}),
+        'rust': frozenset({'.rs'})
+    }
+    
+    MAX_WORKERS = os.cpu_count() or 4
+    
+    def extract_and_scan(self, zip_content) -> list:
+        """Extract ZIP and scan all supported files.
         
-        with zipfile.ZipFile(io.BytesIO(zip_content)) as zf:
-            for file_info in zf.namelist():
-                # Skip directories
-                if file_info.endswith('/'):
-                    continue
-                
-                # Skip ignored directories
-                if any(ignored in file_info for ignored in self.IGNORE_DIRS):
-                    continue
-                
-                # Check if file extension is supported
-                _, ext = os.path.splitext(file_info)
-                if ext not in self.SUPPORTED_EXTENSIONS:
-                    continue
-                
-                try:
-                    # Read file content
-                    content = zf.read(file_info).decode('utf-8', errors='ignore')
-                    
-                    # Skip empty files
-                    if not content.strip():
-                        continue
-                    
-                    # Normalize path (remove leading directory from GitHub ZIP)
-                    path_parts = file_info.split('/', 1)
-                    normalized_path = path_parts[1] if len(path_parts) > 1 else file_info
-                    
-                    files.append({
-                        'path': normalized_path,
-                        'content': content,
-                        'size': len(content)
-                    })
-                    
-                except Exception as e:
-                    # Skip files that can't be read
-                    continue
+        Accepts the archive as bytes or as a seekable file object.
+        """
+        return list(self.iter_files(zip_content))
+    
+    def iter_files(self, zip_content) -> Iterator[dict]:
+        """Yield each supported file's {path, content, size, ext}, in archive order.
         
-        return files
+        Entries are decompressed and decoded on a thread pool (zlib releases
+        the GIL), but only a bounded window of them is in flight, so a
+        consumer that processes files as they arrive never holds the whole
+        decoded repository at once. Pass a file object rather than bytes to
+        keep the archive itself out of memory too.
+        """
+        if isinstance(zip_content, (bytes, bytearray)):
+            zip_content = io.BytesIO(zip_content)
+        
+        with zipfile.ZipFile(zip_content) as zf:
+            names = [name for name in zf.namelist() if self._should_scan(name)]
+            with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as pool:
+                window = deque()
+                for name in names:
+                    window.append(pool.submit(self._read_file, zf, name))
+                    if len(window) > 2 * self.MAX_WORKERS:
+                        f = window.popleft().result()
+                        if f:
+                            yield f
+                while window:
+                    f = window.popleft().result()
+                    if f:
+                        yield f
     
-    def filter_by_language(self, files: list, language: str) -> list:
-        """Filter files by programming language."""
-        language_extensions = {
-            'python': ['.py'],
-            'javascript': ['.js', '.jsx'],
-            'typescript': ['.ts', '.tsx'],
-            'java': ['.java'],
-            'go': ['.go'],
-            'ruby': ['.rb'],
-            'php': ['.php'],
-            'csharp': ['.cs'],
-            'cpp': ['.cpp', '.c', '.h'],
-            'rust': ['.rs']
+    def _should_scan(self, file_info: str) -> bool:
+        # Skip directories
+        if file_info.endswith('/'):
+            return False
+        
+        # Skip anything under an ignored directory (matched per path segment)
+        directory, _, name = file_info.rpartition('/')
+        if directory and not self._IGNORE_SET.isdisjoint(directory.split('/')):
+            return False
+        
+        # Check if file extension is supported
+        _, ext = os.path.splitext(name)
+        return ext in self._SUPPORTED_SET
+    
+    def _read_file(self, zf: zipfile.ZipFile, file_info: str):
+        try:
+            # Read file content
+            content = zf.read(file_info).decode('utf-8', errors='ignore')
+        except Exception:
+            # Skip files that can't be read
+            return None
+        
+        # Skip empty files
+        if not content.strip():
+            return None
+        
+        # Normalize path (remove leading directory from GitHub ZIP)
+        path_parts = file_info.split('/', 1)
+        normalized_path = path_parts[1] if len(path_parts) > 1 else file_info
+        
+        return {
+            'path': normalized_path,
+            'content': content,
+            'size': len(content),
+            'ext': os.path.splitext(normalized_path)[1]
         }
+    
+    def filter_by_language(self, files: list, language: str) -> list:
+        """Filter files by programming language.
         
-        extensions = language_extensions.get(language.lower(), [])
+        Uses the extension recorded at scan time, falling back to the path
+        for file dicts that didn't come from the scanner.
+        """
+        extensions = self.LANGUAGE_EXTENSIONS.get(language.lower())
         if not extensions:
             return files
         
-        return [f for f in files if any(f['path'].endswith(ext) for ext in extensions)]
+        splitext = os.path.splitext
+        return [
+            f for f in files
+            if (f['ext'] if 'ext' in f else splitext(f['path'])[1]) in extensions
+        ]
@@ -1,9 +1,19 @@
 """User repository management service."""
-import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from urllib.parse import urlparse, parse_qs
+from app.utils.http import create_session, ETagCache, DEFAULT_TIMEOUT
 
 logger = logging.getLogger(__name__)
 GITHUB_API = "https://api.github.com"
+# Max concurrent page requests when listing a user's repos
+PAGE_FETCH_WORKERS = 8
+
+# Pooled keep-alive session shared by all calls; tokens are sent per request.
+SESSION = create_session()
+# Repeat listings are revalidated with If-None-Match and served from here on 304.
+ETAGS = ETagCache()
 
 class UserReposService:
     """Fetch and manage user repositories from GitHub."""
@@ -21,37 +31,55 @@ class UserReposService:
         """
         try:
             headers = {"Authorization": f"token {access_token}"}
-            repos = []
-            page = 1
+            url = f"{GITHUB_API}/user/repos"
             
-            while True:
-                resp = requests.get(
-                    f"{GITHUB_API}/user/repos",
+            def fetch(page, page_url=url):
+                resp = ETAGS.get(
+                    SESSION,
+                    page_url,
                     headers=headers,
-                    params={"page": page, "per_page": 100}
+                    params={"page": page, "per_page": 100} if page else None,
+                    timeout=DEFAULT_TIMEOUT
                 )
-                
                 if resp.status_code != 200:
                     logger.error(f"Failed to fetch repos: {resp.status_code}")
-                    break
-                    
-                data = resp.json()
-                if not data:
-                    break
-                
-                for repo in data:
-                    repos.append({
-                        "name": repo.get("name"),
-                        "full_name": repo.get("full_name"),
-                        "url": repo.get("html_url"),
-                        "clone_url": repo.get("clone_url"),
-                        "isPrivate": repo.get("private", False),
-                        "description": repo.get("description"),
-                        "language": repo.get("language"),
-                        "stars": repo.get("stargazers_count", 0)
-                    })
-                
-                page += 1
+                    return None
+                return resp
+            
+            first = fetch(1)
+            if first is None:
+                return []
+            pages = [first.json()]
+            # Page 1's Link header tells us how many pages there are; fetch
+            # the rest concurrently, keeping pages up to the first failure.
+            last_page = UserReposService._last_page(first)
+            if last_page > 1:
+                with ThreadPoolExecutor(max_workers=min(PAGE_FETCH_WORKERS, last_page - 1)) as pool:
+                    for resp in pool.map(fetch, range(2, last_page + 1)):
+                        if resp is None:
+                            break
+                        pages.append(resp.json())
+            else:
+                # No usable rel="last": walk rel="next" links until they stop
+                resp = first
+                while (next_url := resp.links.get("next", {}).get("url")):
+                    resp = fetch(None, next_url)
+                    if resp is None:
+                        break
+                    pages.append(resp.json())
+            
+            repos = []
+            for repo in chain.from_iterable(pages):
+                repos.append({
+                    "name": repo.get("name"),
+                    "full_name": repo.get("full_name"),
+                    "url": repo.get("html_url"),
+                    "clone_url": repo.get("clone_url"),
+                    "isPrivate": repo.get("private", False),
+                    "description": repo.get("description"),
+                    "language": repo.get("language"),
+                    "stars": repo.get("stargazers_count", 0)
+                })
             
             # Sort by stars descending
             repos.sort(key=lambda x: x.get("stars", 0), reverse=True)
@@ -61,6 +89,17 @@ class UserReposService:
             logger.error(f"Error fetching user repos: {str(e)}")
             return []
     
+    @staticmethod
+    def _last_page(resp) -> int:
+        """Page number of the rel="last" link in a paginated response, or 1."""
+        last_url = resp.links.get("last", {}).get("url")
+        if not last_url:
+            return 1
+        try:
+            return int(parse_qs(urlparse(last_url).query).get("page", ["1"])[0])
+        except ValueError:
+            return 1
+    
     @staticmethod
     def check_repo_access(access_token: str, repo_full_name: str):
         """
@@ -76,9 +115,11 @@ class UserReposService:
         """
         try:
             headers = {"Authorization": f"token {access_token}"}
-            resp = requests.get(
+            resp = ETAGS.get(
+                SESSION,
                 f"{GITHUB_API}/repos/{repo_full_name}",
-                headers=headers
+                headers=headers,
+                timeout=DEFAULT_TIMEOUT
             )
             
             if resp.status_code != 200:
@@ -111,8 +152,10 @@ class UserReposService:
             Repo info dict or None if not found
         """
         try:
-            resp = requests.get(
-                f"{GITHUB_API}/repos/{repo_full_name}"
+            resp = ETAGS.get(
+                SESSION,
+                f"{GITHUB_API}/repos/{repo_full_name}",
+                timeout=DEFAULT_TIMEOUT
             )
             
             if resp.status_code != 200:
@@ -151,10 +194,12 @@ class UserReposService:
             if access_token:
                 headers["Authorization"] = f"token {access_token}"
                 
-            resp = requests.get(
+            resp = ETAGS.get(
+                SESSION,
                 f"{GITHUB_API}/search/repositories",
                 headers=headers,
-                params={"q": query, "per_page": 20, "sort": "stars"}
+                params={"q": query, "per_page": 20, "sort": "stars"},
+                timeout=DEFAULT_TIMEOUT
             )
             
             if resp.status_code != 200:
@@ -0,0 +1,79 @@
+"""Shared HTTP session helpers for outbound GitHub calls."""
+import threading
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeout in seconds; pass to every outbound request so a hung
+# upstream can't pin a worker thread forever.
+DEFAULT_TIMEOUT = (3.05, 10)
+
+
+def create_session(pool_connections: int = 20, pool_maxsize: int = 50, headers: dict = None) -> requests.Session:
+    """
+    Build a requests.Session with a pooled, retrying HTTPS adapter.
+
+    The session keeps TCP/TLS connections alive between calls, so it should be
+    created once per module and reused rather than built per request.
+
+    Args:
+        pool_connections: Number of host pools to cache
+        pool_maxsize: Max connections kept alive per host
+        headers: Default headers sent with every request
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        # read=False: a read timeout is raised at once as requests.ReadTimeout
+        # rather than retried and then wrapped in a ConnectionError, so callers
+        # can fail fast on a slow upstream.
+        max_retries=Retry(total=3, read=False, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+    )
+    session.mount('https://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+class ETagCache:
+    """
+    Conditional GETs: remember each 200 response's ETag and body, and send
+    If-None-Match on the next identical request.
+
+    When the upstream answers 304 Not Modified the stored 200 response is
+    returned instead, so callers see the same status, JSON and Link headers
+    as before. GitHub doesn't count 304s against the rate limit. Entries are
+    keyed by URL, query params and Authorization header, so users never see
+    each other's results, and the least recently used are dropped past
+    `maxsize`.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session: requests.Session, url: str, headers: dict = None, params: dict = None, **kwargs) -> requests.Response:
+        headers = dict(headers or {})
+        key = (url, tuple(sorted((params or {}).items())), headers.get('Authorization'))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            headers['If-None-Match'] = entry[0]
+
+        resp = session.get(url, headers=headers, params=params, **kwargs)
+        if resp.status_code == 304 and entry is not None:
+            return entry[1]
+        etag = resp.headers.get('ETag')
+        if resp.status_code == 200 and etag:
+            resp.content  # read the body now so the cached response can be replayed
+            with self._lock:
+                self._entries[key] = (etag, resp)
+                self._entries.move_to_end(key)
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return resp
@@ -2,6 +2,14 @@
 import os
 import re
 
+# A file header: a '--- old' line immediately followed by its '+++ new' line.
+_FILE_HEADER_RE = re.compile(r'^--- ([^\n]*)\n\+\+\+ ([^\n]*)$', re.MULTILINE)
+_HUNK_HEADER_RE = re.compile(r'^@@[^\n]*', re.MULTILINE)
+# Line ranges of a hunk header: @@ -old_start,old_count +new_start,new_count @@
+_HUNK_RANGE_RE = re.compile(r'@@ -(\d+),?(\d*) \+(\d+),?(\d*) @@')
+# Hunk body lines: additions, deletions and context, but not '+++'/'---' lines
+_BODY_LINE_RE = re.compile(r'^(?:\+(?!\+\+)|-(?!--)| )[^\n]*', re.MULTILINE)
+
 def apply_unified_diff(repo_path: str, patch_content: str):
     """
     Apply a unified diff patch to files in a repository.
@@ -32,86 +40,90 @@ def apply_unified_diff(repo_path: str, patch_content: str):
         else:
             # Modify existing file
             if os.path.exists(full_path):
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    original_content = f.read()
-                
-                # Apply diff
-                new_content = apply_diff_to_content(original_content, file_patch['hunks'])
-                
-                with open(full_path, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
+                _patch_file(full_path, file_patch['hunks'])
+
+def _patch_file(full_path: str, hunks: list):
+    """
+    Apply hunks to one file in place, rewriting only from the first change on.
+    
+    Lines before the first hunk come through unchanged, so that prefix is
+    left on disk and only the tail is written (and the file truncated to its
+    new length). Files with '\r' line endings are normalized to '\n' as
+    text-mode I/O would, which changes them throughout, so they are still
+    rewritten whole; a patch that changes nothing isn't written at all.
+    """
+    with open(full_path, 'r+b') as f:
+        data = f.read()
+        original_content = data.decode('utf-8')
+        normalize = '\r' in original_content
+        if normalize:
+            original_content = original_content.replace('\r\n', '\n').replace('\r', '\n')
+        
+        # Apply diff
+        new_data = apply_diff_to_content(original_content, hunks).encode('utf-8')
+        if new_data == data:
+            return
+        
+        start = 0
+        first = next((m for m in map(_HUNK_RANGE_RE.match, (h['header'] for h in hunks)) if m), None)
+        if first and not normalize:
+            prefix = re.match(rb'(?:[^\n]*\n){%d}' % max(int(first.group(1)) - 1, 0), data)
+            if prefix and memoryview(new_data)[:prefix.end()] == memoryview(data)[:prefix.end()]:
+                start = prefix.end()
+        
+        f.seek(start)
+        f.write(memoryview(new_data)[start:])
+        f.truncate()
 
 def parse_patch(patch_content: str):
-    """Parse unified diff patch content into structured format."""
-    patches = []
-    current_patch = None
+    """Parse unified diff patch content into structured format.
     
-    lines = patch_content.split('\n')
-    i = 0
+    File headers, hunk headers and hunk bodies are each located with one
+    compiled-regex pass over the text. Hunk lines are kept as the raw diff
+    lines; their first character ('+', '-' or ' ') says what they are.
+    """
+    patches = []
+    headers = list(_FILE_HEADER_RE.finditer(patch_content))
     
-    while i < len(lines):
-        line = lines[i]
+    for n, header in enumerate(headers):
+        end = headers[n + 1].start() if n + 1 < len(headers) else len(patch_content)
+        old_file = header.group(1).strip()
+        new_file = header.group(2).strip()
         
-        # Check for file header
-        if line.startswith('--- '):
-            if current_patch:
-                patches.append(current_patch)
-            
-            # Extract file path
-            old_file = line[4:].strip()
-            i += 1
-            
-            if i < len(lines) and lines[i].startswith('+++ '):
-                new_file = lines[i][4:].strip()
-                i += 1
-                
-                # Determine if new, deleted, or modified
-                is_new = old_file == '/dev/null' or old_file.startswith('a/')
-                is_deleted = new_file == '/dev/null'
-                
-                # Extract actual path
-                if is_new and new_file.startswith('b/'):
-                    path = new_file[2:]
-                elif old_file.startswith('a/'):
-                    path = old_file[2:]
-                else:
-                    path = new_file
-                
-                current_patch = {
-                    'path': path,
-                    'is_new': is_new,
-                    'is_deleted': is_deleted,
-                    'hunks': [],
-                    'new_content': ''
-                }
+        # Determine if new, deleted, or modified
+        is_new = old_file == '/dev/null'
+        is_deleted = new_file == '/dev/null'
         
-        # Check for hunk header
-        elif line.startswith('@@'):
-            if current_patch:
-                hunk = {'header': line, 'lines': []}
-                current_patch['hunks'].append(hunk)
+        # Extract actual path
+        if is_new and new_file.startswith('b/'):
+            path = new_file[2:]
+        elif old_file.startswith('a/'):
+            path = old_file[2:]
+        else:
+            path = new_file
         
-        # Content lines
-        elif current_patch:
-            if line.startswith('+') and not line.startswith('+++'):
-                # Addition
-                if current_patch['is_new']:
-                    current_patch['new_content'] += line[1:] + '\n'
-                elif current_patch['hunks']:
-                    current_patch['hunks'][-1]['lines'].append(('add', line[1:]))
-            elif line.startswith('-') and not line.startswith('---'):
-                # Deletion
-                if current_patch['hunks']:
-                    current_patch['hunks'][-1]['lines'].append(('del', line[1:]))
-            elif line.startswith(' '):
-                # Context
-                if current_patch['hunks']:
-                    current_patch['hunks'][-1]['lines'].append(('ctx', line[1:]))
+        file_patch = {
+            'path': path,
+            'is_new': is_new,
+            'is_deleted': is_deleted,
+            'hunks': [],
+            'new_content': ''
+        }
         
-        i += 1
-    
-    if current_patch:
-        patches.append(current_patch)
+        if is_new:
+            # A new file's content is every added line
+            added = [line[1:] for line in _BODY_LINE_RE.findall(patch_content, header.end(), end) if line[0] == '+']
+            file_patch['new_content'] = '\n'.join(added) + '\n' if added else ''
+        else:
+            hunk_headers = list(_HUNK_HEADER_RE.finditer(patch_content, header.end(), end))
+            for k, hunk_header in enumerate(hunk_headers):
+                body_end = hunk_headers[k + 1].start() if k + 1 < len(hunk_headers) else end
+                file_patch['hunks'].append({
+                    'header': hunk_header.group(),
+                    'lines': _BODY_LINE_RE.findall(patch_content, hunk_header.end(), body_end)
+                })
+        
+        patches.append(file_patch)
     
     return patches
 
@@ -123,33 +135,31 @@ def apply_diff_to_content(original: str, hunks: list):
     
     for hunk in hunks:
         # Parse hunk header to get line numbers
-        # Format: @@ -old_start,old_count +new_start,new_count @@
-        match = re.match(r'@@ -(\d+),?(\d*) \+(\d+),?(\d*) @@', hunk['header'])
+        match = _HUNK_RANGE_RE.match(hunk['header'])
         if match:
             old_start = int(match.group(1)) - 1  # Convert to 0-indexed
             
             # Copy lines before hunk
-            while line_idx < old_start and line_idx < len(lines):
-                result.append(lines[line_idx])
-                line_idx += 1
+            if line_idx < old_start:
+                result.extend(lines[line_idx:old_start])
+                line_idx = max(line_idx, min(old_start, len(lines)))
             
             # Apply hunk changes
-            for change_type, content in hunk['lines']:
-                if change_type == 'ctx':
+            for line in hunk['lines']:
+                change_type = line[0]
+                if change_type == ' ':
                     # Context line - copy from original
                     if line_idx < len(lines):
                         result.append(lines[line_idx])
                         line_idx += 1
-                elif change_type == 'add':
+                elif change_type == '+':
                     # Addition - add new line
-                    result.append(content)
-                elif change_type == 'del':
+                    result.append(line[1:])
+                else:
                     # Deletion - skip original line
                     line_idx += 1
     
     # Copy remaining lines
-    while line_idx < len(lines):
-        result.append(lines[line_idx])
-        line_idx += 1
+    result.extend(lines[line_idx:])
     
     return '\n'.join(result)
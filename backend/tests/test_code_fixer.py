@@ -0,0 +1,59 @@
+import json
+
+from app.services.code_fixer import CodeFixer, EnhancementPatchGenerator
+
+LINT = {'title': 'Add lint script', 'file': 'package.json', 'line': 1}
+TEST = {'title': 'Add test script', 'file': 'package.json', 'line': 1}
+
+
+def test_apply_fixes_adds_both_missing_npm_scripts():
+    content = '{\n  "name": "demo",\n  "scripts": {\n    "start": "node index.js"\n  }\n}\n'
+    fixed, applied = CodeFixer.apply_fixes([LINT, TEST], content)
+    assert applied == [LINT, TEST]
+    assert '"lint": "eslint ."' in fixed
+    assert '"test": "jest"' in fixed
+    assert '"start": "node index.js"' in fixed
+
+
+def test_apply_fixes_adds_both_scripts_without_scripts_object():
+    fixed, applied = CodeFixer.apply_fixes([LINT, TEST], '{"name": "demo"}')
+    assert applied == [LINT, TEST]
+    assert '"lint": "eslint ."' in fixed
+    assert '"test": "jest"' in fixed
+
+
+def test_enhancement_patch_lists_both_npm_scripts():
+    files = [{'path': 'package.json', 'content': '{\n  "scripts": {\n    "start": "node ."\n  }\n}\n'}]
+    patch = EnhancementPatchGenerator.generate_enhancement_patch([LINT, TEST], files)
+    assert '# Enhancement: Add lint script' in patch
+    assert '# Enhancement: Add test script' in patch
+    assert '+    "lint": "eslint .",' in patch
+    assert '+    "test": "jest",' in patch
+
+
+def test_npm_script_goes_into_top_level_scripts_not_nested_ones():
+    content = '{\n  "config": {"scripts": {}},\n  "standard-version": {"scripts": {"postbump": "x"}},\n  "scripts": {\n    "start": "node ."\n  }\n}\n'
+    fixed = CodeFixer.generate_fix(LINT, content)
+    data = json.loads(fixed)
+    assert data['scripts'] == {'lint': 'eslint .', 'start': 'node .'}
+    assert data['config'] == {'scripts': {}}
+    assert data['standard-version'] == {'scripts': {'postbump': 'x'}}
+    # Spliced in place, not re-serialized
+    assert fixed.startswith('{\n  "config": {"scripts": {}},\n')
+
+
+def test_npm_script_ignores_scripts_text_inside_strings():
+    content = '{"description": "see \\"scripts\\": {}", "scripts": {"start": "node ."}}'
+    data = json.loads(CodeFixer.generate_fix(TEST, content))
+    assert data['description'] == 'see "scripts": {}'
+    assert data['scripts'] == {'test': 'jest', 'start': 'node .'}
+
+
+def test_npm_script_with_only_nested_scripts_adds_top_level_object():
+    content = '{"config": {"scripts": {"a": "b"}}}'
+    data = json.loads(CodeFixer.generate_fix(LINT, content))
+    assert data == {'config': {'scripts': {'a': 'b'}}, 'scripts': {'lint': 'eslint .'}}
+
+
+def test_npm_script_fix_skips_malformed_package_json():
+    assert CodeFixer.generate_fix(LINT, '{"scripts": {"start": "node ."},') is None
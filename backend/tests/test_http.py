@@ -0,0 +1,70 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from app.utils.http import create_session
+
+
+@pytest.fixture
+def silent_server():
+    """A TCP server that accepts connections and never answers; yields (url, accepted connections)."""
+    srv = socket.socket()
+    srv.bind(('127.0.0.1', 0))
+    srv.listen()
+    accepted = []
+
+    def accept():
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            accepted.append(conn)
+
+    threading.Thread(target=accept, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.getsockname()[1]}/", accepted
+    srv.close()
+    for conn in accepted:
+        conn.close()
+
+
+def test_read_timeout_is_raised_as_timeout_without_retrying(silent_server):
+    url, accepted = silent_server
+    session = create_session()
+    session.mount('http://', session.get_adapter('https://'))
+
+    with pytest.raises(requests.Timeout):
+        session.get(url, timeout=(1, 0.2))
+    assert len(accepted) == 1
+
+
+def test_get_user_maps_read_timeout_to_504(monkeypatch):
+    pytest.importorskip('fastapi')
+    from fastapi import HTTPException
+    from app.api import auth
+
+    def read_timeout(*args, **kwargs):
+        raise requests.ReadTimeout('read timed out')
+
+    monkeypatch.setattr(auth.SESSION, 'get', read_timeout)
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(auth.get_user('token'))
+    assert excinfo.value.status_code == 504
+
+
+def test_callback_maps_read_timeout_to_504(monkeypatch):
+    pytest.importorskip('fastapi')
+    from fastapi import HTTPException
+    from app.api import auth
+
+    def read_timeout(*args, **kwargs):
+        raise requests.ReadTimeout('read timed out')
+
+    monkeypatch.setattr(auth.SESSION, 'post', read_timeout)
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(auth.github_callback('code'))
+    assert excinfo.value.status_code == 504
@@ -0,0 +1,65 @@
+import types
+
+import pytest
+
+from app.services.llm_gemini_real import _next_retry_delay
+
+
+class APIError(Exception):
+    """Stand-in for google.genai.errors.APIError, which carries `code`."""
+
+    def __init__(self, code, response=None):
+        super().__init__(f"{code} error")
+        self.code = code
+        self.response = response
+
+
+# Same names and hierarchy as httpx's, for when httpx isn't installed.
+class TransportError(Exception):
+    pass
+
+
+class ConnectError(TransportError):
+    pass
+
+
+class ReadTimeout(TransportError):
+    pass
+
+
+def _delay(exc):
+    return _next_retry_delay(exc, iter([1.5]))
+
+
+@pytest.mark.parametrize('exc', [
+    APIError(429),
+    APIError(500),
+    APIError(503),
+    ConnectionError('reset by peer'),
+    TimeoutError('timed out'),
+    ConnectError('connection refused'),
+    ReadTimeout('read timed out'),
+    Exception('429 RESOURCE_EXHAUSTED'),
+], ids=lambda exc: type(exc).__name__ + ':' + str(exc))
+def test_transient_errors_are_retried(exc):
+    assert _delay(exc) == 1.5
+
+
+@pytest.mark.parametrize('name', ['ConnectError', 'ConnectTimeout', 'ReadTimeout', 'ReadError', 'RemoteProtocolError'])
+def test_httpx_transport_errors_are_retried(name):
+    httpx = pytest.importorskip('httpx')
+    assert _delay(getattr(httpx, name)('boom')) == 1.5
+
+
+@pytest.mark.parametrize('exc', [APIError(400), APIError(403), ValueError('bad reply')])
+def test_permanent_errors_are_not_retried(exc):
+    assert _delay(exc) is None
+
+
+def test_gives_up_when_attempts_run_out():
+    assert _next_retry_delay(ConnectError('refused'), iter([])) is None
+
+
+def test_retry_after_overrides_backoff():
+    response = types.SimpleNamespace(headers={'Retry-After': '7'}, status_code=429)
+    assert _delay(APIError(429, response)) == 7.0
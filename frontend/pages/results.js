@@ -200,13 +200,18 @@ export default function Results() {
 
   const downloadPDFReport = async () => {
     try {
-      const resp = await axios.post(`${process.env.NEXT_PUBLIC_API_URL}/api/download-report/${job_id}`);
-      const binary = Buffer.from(resp.data.pdf, 'hex');
-      const blob = new Blob([binary], { type: 'application/pdf' });
-      const url = window.URL.createObjectURL(blob);
+      const resp = await axios.post(
+        `${process.env.NEXT_PUBLIC_API_URL}/api/download-report/${job_id}`,
+        null,
+        { responseType: 'blob' }
+      );
+      const disposition = resp.headers['content-disposition'] || '';
+      const match = disposition.match(/filename="?([^";]+)"?/);
+      const filename = match ? match[1] : 'audit_report.pdf';
+      const url = window.URL.createObjectURL(resp.data);
       const link = document.createElement('a');
       link.href = url;
-      link.setAttribute('download', resp.data.filename);
+      link.setAttribute('download', filename);
       document.body.appendChild(link);
       link.click();
       link.parentNode.removeChild(link);